@@ -0,0 +1,92 @@
+"""
+Conflict Audit
+--------------
+Runs the conflict detector over every exam period at once, spreading the
+periods across a process pool. Each worker opens its own read-only SQLite
+connection. Run directly:
+
+    python audit.py [--workers N] [--db exam_scheduler.db]
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+
+import scheduler
+from conflict_checker import detect_all_conflicts
+from scheduler import EXAM_COLUMNS, EXAM_ID
+
+
+def _audit_period(db_path, period_id):
+    """Worker: conflict report for one period, as exam-id pairs per conflict type."""
+    start = time.perf_counter()
+    uri = f"file:{db_path}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True, timeout=30)) as conn:
+        exams = conn.execute(f"""
+            SELECT {EXAM_COLUMNS}
+            FROM exams
+            WHERE period_id=?
+            ORDER BY exam_date, exam_slot, subject_code
+        """, (period_id,)).fetchall()
+    conflicts = detect_all_conflicts(exams=exams)
+    return {
+        "period_id": period_id,
+        "exams": len(exams),
+        "conflicts": {kind: [(a[EXAM_ID], b[EXAM_ID]) for a, b in pairs]
+                      for kind, pairs in conflicts.items()},
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def audit_all_periods(workers=None, period_ids=None, db_path=None):
+    """
+    Audits every exam period (or just period_ids) in parallel.
+    Returns {"periods": {period_id: report}, "totals": {conflict_type: count},
+             "exams": n, "seconds": wall_time, "periods_per_second": rate}
+    """
+    db_path = os.path.abspath(db_path or scheduler.DB_NAME)
+    if period_ids is None:
+        uri = f"file:{db_path}?mode=ro"
+        with closing(sqlite3.connect(uri, uri=True, timeout=30)) as conn:
+            period_ids = [r[0] for r in conn.execute("SELECT period_id FROM exam_periods ORDER BY period_id")]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        reports = list(pool.map(_audit_period, [db_path] * len(period_ids), period_ids))
+    elapsed = time.perf_counter() - start
+
+    totals = {}
+    for report in reports:
+        for kind, pairs in report["conflicts"].items():
+            totals[kind] = totals.get(kind, 0) + len(pairs)
+    return {
+        "periods": {r["period_id"]: r for r in reports},
+        "totals": totals,
+        "exams": sum(r["exams"] for r in reports),
+        "seconds": elapsed,
+        "periods_per_second": len(reports) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit every exam period for conflicts.")
+    parser.add_argument("--workers", type=int, default=None, help="process count (default: CPU count)")
+    parser.add_argument("--db", default=scheduler.DB_NAME, help="database file")
+    args = parser.parse_args()
+
+    result = audit_all_periods(workers=args.workers, db_path=args.db)
+    print(f"{'period':>6} {'exams':>6} {'room':>5} {'proctor':>7} {'instr':>5} {'section':>7} {'secs':>7}")
+    for pid, r in sorted(result["periods"].items()):
+        c = r["conflicts"]
+        print(f"{pid:>6} {r['exams']:>6} {len(c['room_conflicts']):>5} {len(c['proctor_conflicts']):>7} "
+              f"{len(c['instructor_conflicts']):>5} {len(c['section_conflicts']):>7} {r['seconds']:7.3f}")
+    print(f"\n{len(result['periods'])} periods, {result['exams']} exams in {result['seconds']:.2f}s "
+          f"({result['periods_per_second']:.1f} periods/s)")
+    print("Totals:", ", ".join(f"{k}={v}" for k, v in result["totals"].items()))
+
+
+if __name__ == "__main__":
+    main()
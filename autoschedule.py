@@ -0,0 +1,316 @@
+"""
+Auto Scheduler
+--------------
+Places a whole period's exams at once instead of one by one through the
+Faculty tab:
+- Conflict graph over subjects: shared section, shared instructor, or
+  sections with students in common (enrollments)
+- DSATUR graph coloring onto the period's (date, time slot) grid
+- Result written to exams in a single transaction
+"""
+
+import datetime
+import time
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+
+import scheduler
+from scheduler import db_query, list_exams, DATE, SLOT, INSTRUCTOR, PROCTOR, ROOM, SECTION, CODE, TITLE
+from timeslots import slot_lane, slots_overlap
+
+SUNDAY = 6
+
+
+# -------------------------------
+# Inputs
+# -------------------------------
+
+def period_grid(period_id, skip_weekdays=(SUNDAY,)):
+    """Returns the period's (date, slot) pairs in date-then-time order; these are the colors."""
+    rows = db_query("SELECT start_date, end_date FROM exam_periods WHERE period_id=?", (period_id,))
+    if not rows:
+        raise ValueError(f"No exam period with id {period_id}")
+    return date_grid(*rows[0], skip_weekdays=skip_weekdays)
+
+
+def date_grid(start_date, end_date, skip_weekdays=(SUNDAY,)):
+    """period_grid() for a date range that need not be saved as a period yet."""
+    start, end = (datetime.date.fromisoformat(d.strip()) for d in (start_date, end_date))
+    slots = sorted((r[0] for r in db_query("SELECT slot_label FROM time_slots")),
+                   key=lambda s: slot_lane(s)[1:])
+    grid = []
+    day = start
+    while day <= end:
+        if day.weekday() not in skip_weekdays:
+            grid.extend((day.isoformat(), slot) for slot in slots)
+        day += datetime.timedelta(days=1)
+    return grid
+
+
+def grid_overlaps(grid):
+    """
+    overlaps[c]: every color whose slot overlaps color c's on the same date,
+    c itself included. Exams in any of them compete for the same rooms,
+    sections and people.
+    """
+    colors_at = defaultdict(list)
+    for c, (date, slot) in enumerate(grid):
+        colors_at[date].append((c, slot))
+    return [frozenset(o for o, other in colors_at[date] if slots_overlap(slot, other))
+            for date, slot in grid]
+
+
+def load_subject_nodes(subject_codes=None):
+    """
+    One node per subject: {"code", "title", "instructor", "username", "sections"}.
+    sections holds every section id listed in subjects.section_name; the exam
+    row records the first one, the conflict graph uses them all.
+    """
+    section_ids = {name.strip().lower(): sid for sid, name in db_query("SELECT section_id, section_name FROM sections")}
+    usernames = {name.strip().lower(): user for user, name in
+                 db_query("SELECT username, name FROM accounts WHERE role='Faculty'")}
+    wanted = set(subject_codes) if subject_codes is not None else None
+    nodes = []
+    for code, title, instructor, section_names in db_query(
+            "SELECT code, title, instructor, section_name FROM subjects ORDER BY code"):
+        if wanted is not None and code not in wanted:
+            continue
+        sections = []
+        for name in (section_names or "").split(","):
+            sid = section_ids.get(name.strip().lower())
+            if sid is not None and sid not in sections:
+                sections.append(sid)
+        nodes.append({
+            "code": code,
+            "title": title,
+            "instructor": instructor,
+            "username": usernames.get(instructor.strip().lower(), instructor),
+            "sections": sections,
+        })
+    return nodes
+
+
+def shared_student_sections():
+    """Pairs of section ids that have at least one enrolled student in common."""
+    # Only students in two or more sections can link sections; SQLite finds
+    # them from the primary key without handing every enrollment to Python
+    pairs = set()
+    for a, b in db_query("""
+        WITH multi AS (
+            SELECT student_id FROM enrollments GROUP BY student_id HAVING COUNT(*) > 1
+        )
+        SELECT DISTINCT x.section_id, y.section_id
+        FROM multi
+        JOIN enrollments x ON x.student_id = multi.student_id
+        JOIN enrollments y ON y.student_id = multi.student_id AND y.section_id > x.section_id
+    """):
+        pairs.add((a, b))
+        pairs.add((b, a))
+    return pairs
+
+
+def build_conflict_graph(nodes, student_pairs=()):
+    """Adjacency sets: nodes that may not share a time slot."""
+    adj = [set() for _ in nodes]
+    by_section = defaultdict(list)
+    by_instructor = defaultdict(list)
+    for v, node in enumerate(nodes):
+        for sid in node["sections"]:
+            by_section[sid].append(v)
+        by_instructor[node["username"].lower()].append(v)
+
+    for group in list(by_section.values()) + list(by_instructor.values()):
+        for v in group:
+            adj[v].update(group)
+    for a, b in student_pairs:
+        for v in by_section.get(a, ()):
+            adj[v].update(by_section.get(b, ()))
+    for v in range(len(nodes)):
+        adj[v].discard(v)
+    return adj
+
+
+# -------------------------------
+# DSATUR
+# -------------------------------
+
+def dsatur(adj, capacity, forbidden=None, fixed=None, overlaps=None):
+    """
+    Colors the graph with DSATUR: repeatedly take the node whose neighbors
+    already use the most distinct colors (ties: highest degree) and give it
+    the lowest color that is free for it and still under capacity.
+    capacity[c]: how many nodes color c can hold.
+    forbidden[v]: colors node v may not use (pre-existing bookings).
+    fixed: {v: color} for nodes colored in advance (warm start); the caller
+    makes sure these are consistent.
+    overlaps[c]: colors that may not be used next to c (see grid_overlaps()).
+    A node on c blocks all of them for its neighbors and takes a unit of
+    every one's capacity. Default: each color overlaps only itself.
+    Returns a color index, or None, per node.
+    """
+    n_colors = len(capacity)
+    overlaps = overlaps or [(c,) for c in range(n_colors)]
+    load = [0] * n_colors
+    saturation = [set(forbidden[v]) if forbidden else set() for v in range(len(adj))]
+    color = [None] * len(adj)
+    done = [False] * len(adj)
+    for v, c in (fixed or {}).items():
+        color[v], done[v] = c, True
+        for o in overlaps[c]:
+            load[o] += 1
+        for u in adj[v]:
+            saturation[u].update(overlaps[c])
+    heap = [(-len(saturation[v]), -len(adj[v]), v) for v in range(len(adj))]
+    heapify(heap)
+    while heap:
+        neg_sat, _neg_deg, v = heappop(heap)
+        if done[v] or -neg_sat != len(saturation[v]):
+            continue  # stale heap entry
+        done[v] = True
+        blocked = saturation[v]
+        c = next((c for c in range(n_colors)
+                  if c not in blocked and all(load[o] < capacity[o] for o in overlaps[c])), None)
+        color[v] = c
+        if c is None:
+            continue
+        for o in overlaps[c]:
+            load[o] += 1
+        for u in adj[v]:
+            if not done[u] and not saturation[u].issuperset(overlaps[c]):
+                saturation[u].update(overlaps[c])
+                heappush(heap, (-len(saturation[u]), -len(adj[u]), u))
+    return color
+
+
+# -------------------------------
+# Scheduling
+# -------------------------------
+
+def week_offset_map(from_period_id, grid):
+    """
+    Maps each date of an earlier period onto the grid's dates by position in
+    the week: days counted from the Monday of each period's first week.
+    Dates that land outside the grid are left out.
+    """
+    rows = db_query("SELECT start_date, end_date FROM exam_periods WHERE period_id=?", (from_period_id,))
+    if not rows:
+        raise ValueError(f"No exam period with id {from_period_id}")
+    old_start, old_end = (datetime.date.fromisoformat(d.strip()) for d in rows[0])
+    if not grid:
+        return {}
+    new_dates = {d for d, _ in grid}
+    new_start = datetime.date.fromisoformat(min(new_dates))
+    old_monday = old_start - datetime.timedelta(days=old_start.weekday())
+    new_monday = new_start - datetime.timedelta(days=new_start.weekday())
+    mapping = {}
+    day = old_start
+    while day <= old_end:
+        target = (new_monday + (day - old_monday)).isoformat()
+        if target in new_dates:
+            mapping[day.isoformat()] = target
+        day += datetime.timedelta(days=1)
+    return mapping
+
+
+def schedule_period(period_id, subject_codes=None, dry_run=False, skip_weekdays=(SUNDAY,),
+                    warm_start_from=None):
+    """
+    Schedules every subject (or just subject_codes) that has no exam in the
+    period yet. Existing exams stay where they are and block their rooms,
+    sections and instructors. Each placed exam gets a free room and its
+    instructor as proctor.
+    warm_start_from: an earlier period_id whose timetable seeds this one.
+    Each subject keeps its old weekday, slot and (if free) room wherever that
+    is still conflict-free; only the rest is solved.
+    Returns {"placed": [(code, title, date, slot, room)], "unplaced": [(code, title, reason)],
+             "kept": subjects placed from the warm start, "seconds": elapsed}
+    """
+    start_time = time.perf_counter()
+    grid = period_grid(period_id, skip_weekdays)
+    existing = list_exams(period_id)
+    examined = {(e[CODE], e[TITLE]) for e in existing}
+    nodes = [n for n in load_subject_nodes(subject_codes) if (n["code"], n["title"]) not in examined]
+
+    unplaced = [(n["code"], n["title"], "no known section") for n in nodes if not n["sections"]]
+    nodes = [n for n in nodes if n["sections"]]
+
+    # What existing exams already hold, per grid color
+    rooms = [r[0] for r in db_query("SELECT room_label FROM rooms ORDER BY capacity DESC, room_label")
+             if (r[0] or "").strip()]
+    free_rooms = [list(rooms) for _ in grid]
+    busy = defaultdict(set)  # ("section", id) / ("instructor", username) / ("proctor", name) -> colors
+    colors_at = defaultdict(list)
+    for c, (date, slot) in enumerate(grid):
+        colors_at[date].append((c, slot))
+    for e in existing:
+        for c, slot in colors_at.get(e[DATE], ()):
+            if slots_overlap(slot, e[SLOT]):
+                busy[("section", e[SECTION])].add(c)
+                busy[("instructor", e[INSTRUCTOR].lower())].add(c)
+                busy[("proctor", e[PROCTOR].lower())].add(c)
+                free_rooms[c] = [r for r in free_rooms[c] if r.lower() != e[ROOM].lower()]
+
+    forbidden = []
+    for n in nodes:
+        blocked = set(busy.get(("instructor", n["username"].lower()), ()))
+        # The instructor will proctor the new exam, so their proctoring duties count too
+        blocked |= busy.get(("proctor", n["instructor"].lower()), set())
+        for sid in n["sections"]:
+            blocked |= busy.get(("section", sid), set())
+        forbidden.append(blocked)
+
+    adj = build_conflict_graph(nodes, shared_student_sections())
+    capacity = [len(r) for r in free_rooms]
+    # Overlapping slots on a date share one pool of rooms
+    overlaps = grid_overlaps(grid)
+
+    def claim(c, room):
+        for o in overlaps[c]:
+            free_rooms[o] = [r for r in free_rooms[o] if r.lower() != room.lower()]
+
+    # Warm start: previous placements that still fit become pre-colored nodes
+    fixed, rooms_wanted = {}, {}
+    if warm_start_from is not None:
+        dates = week_offset_map(warm_start_from, grid)
+        color_of = {cell: c for c, cell in enumerate(grid)}
+        previous = {(e[CODE], e[TITLE]): e for e in list_exams(warm_start_from)}
+        load = [0] * len(grid)
+        for v, n in enumerate(nodes):
+            old = previous.get((n["code"], n["title"]))
+            c = color_of.get((dates.get(old[DATE]), old[SLOT])) if old else None
+            if (c is None or c in forbidden[v] or any(load[o] >= capacity[o] for o in overlaps[c])
+                    or any(fixed.get(u) in overlaps[c] for u in adj[v])):
+                continue
+            fixed[v] = c
+            for o in overlaps[c]:
+                load[o] += 1
+            rooms_wanted[v] = old[ROOM]
+        # Kept exams claim their old rooms before anyone else picks
+        for v, c in fixed.items():
+            wanted = rooms_wanted[v].lower()
+            match = next((r for r in free_rooms[c] if r.lower() == wanted), None)
+            if match is not None:
+                claim(c, match)
+            rooms_wanted[v] = match
+
+    colors = dsatur(adj, capacity, forbidden, fixed, overlaps)
+
+    placed, rows = [], []
+    for v, (n, c) in enumerate(zip(nodes, colors)):
+        if c is None:
+            unplaced.append((n["code"], n["title"], "no conflict-free slot with a free room"))
+            continue
+        date, slot = grid[c]
+        room = rooms_wanted.get(v)
+        if room is None:
+            room = free_rooms[c][0]
+            claim(c, room)
+        placed.append((n["code"], n["title"], date, slot, room))
+        rows.append((n["username"], n["code"], n["title"], date, slot, n["instructor"], room,
+                     period_id, n["sections"][0]))
+
+    if rows and not dry_run:
+        scheduler.add_exams(rows)
+
+    return {"placed": placed, "unplaced": unplaced, "kept": len(fixed),
+            "seconds": time.perf_counter() - start_time}
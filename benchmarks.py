@@ -0,0 +1,619 @@
+"""
+Benchmarks
+----------
+Timing scripts for the scheduling back end. Run directly:
+
+    python benchmarks.py
+"""
+
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+
+import scheduler
+import conflict_checker
+from conflict_checker import (
+    find_conflicts, explain_sql_conflicts, detect_all_conflicts, SQL_CONFLICT_KEYS,
+    ROOM, PROCTOR, INSTRUCTOR, SECTION
+)
+
+SLOTS = ["7:30-9:30 AM", "10:00-12:00 PM", "1:00-3:00 PM", "3:30-5:30 PM"]
+
+
+def make_exams(n, seed=0, days=10, spread=1):
+    """
+    Builds n synthetic rows shaped like list_exams() output.
+    spread multiplies the room/proctor/instructor/section pools; higher
+    values mean fewer random collisions.
+    """
+    rng = random.Random(seed)
+    rooms = max(4, n * spread // (days * len(SLOTS)))
+    exams = []
+    for i in range(n):
+        exams.append((
+            f"2025-12-{1 + rng.randrange(days):02d}",
+            rng.choice(SLOTS),
+            f"SUBJ {i}",
+            f"Subject {i}",
+            f"faculty{rng.randrange(max(1, n * spread // 4))}",
+            f"Proctor {rng.randrange(max(1, n * spread // 4))}",
+            f"Room {rng.randrange(rooms)}",
+            rng.randrange(max(1, n * spread // 6)),
+        ))
+    exams.sort(key=lambda e: (e[0], e[1], e[2]))
+    return exams
+
+
+def quadratic_conflicts(exams, column, ignore_case=True):
+    """The original nested-loop check, kept as a reference for comparison."""
+    norm = (lambda v: v.lower()) if ignore_case else (lambda v: v)
+    conflicts = []
+    for i in range(len(exams)):
+        for j in range(i + 1, len(exams)):
+            if (norm(exams[i][column]) == norm(exams[j][column]) and
+                exams[i][0] == exams[j][0] and
+                exams[i][1] == exams[j][1]):
+                conflicts.append((exams[i], exams[j]))
+    return conflicts
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_bucket_engine(sizes=(1000, 2000, 4000, 8000, 16000, 32000), quadratic_limit=4000):
+    print("== Bucket conflict engine (all four dimensions) ==")
+    print(f"{'exams':>8} {'bucket s':>10} {'us/exam':>9} {'nested s':>10}")
+    columns = [(ROOM, True), (PROCTOR, True), (INSTRUCTOR, True), (SECTION, False)]
+    for n in sizes:
+        exams = make_exams(n)
+        bucket_t = 0.0
+        nested_t = None
+        for column, ignore_case in columns:
+            t, fast = _time(find_conflicts, exams, column, ignore_case)
+            bucket_t += t
+            if n <= quadratic_limit:
+                t, slow = _time(quadratic_conflicts, exams, column, ignore_case)
+                nested_t = (nested_t or 0.0) + t
+                assert fast == slow, "bucket engine disagrees with nested loops"
+        nested = f"{nested_t:10.3f}" if nested_t is not None else f"{'-':>10}"
+        print(f"{n:>8} {bucket_t:10.4f} {bucket_t / n * 1e6:9.2f} {nested}")
+
+
+def bench_engines(sizes=(10_000, 100_000, 1_000_000), spread=50):
+    """Pure-Python vs NumPy bucketing inside detect_all_conflicts(), on a mostly clean period."""
+    print("== detect_all_conflicts engines ==")
+    if conflict_checker.np is None:
+        print("  NumPy is not installed; only the Python engine is available.")
+    print(f"{'exams':>9} {'python s':>10} {'numpy s':>10} {'speedup':>8}")
+    for n in sizes:
+        exams = make_exams(n, spread=spread)
+        py_t, py_result = _time(detect_all_conflicts, None, exams, "python", "python")
+        if conflict_checker.np is None:
+            print(f"{n:>9} {py_t:10.3f} {'-':>10} {'-':>8}")
+            continue
+        np_t, np_result = _time(detect_all_conflicts, None, exams, "python", "numpy")
+        assert np_result == py_result, "NumPy engine disagrees with the Python engine"
+        print(f"{n:>9} {py_t:10.3f} {np_t:10.3f} {py_t / np_t:7.2f}x")
+
+
+def bench_enrollments(students=20_000, sections=2_000, per_student=6, days=10):
+    """Bulk import plus bitset student-conflict detection at registrar scale."""
+    import enrollment
+    print("== Student enrollment conflicts ==")
+    rng = random.Random(0)
+    path = use_temp_db()
+    try:
+        rows = [(f"S{s:05d}", sec) for s in range(students)
+                for sec in rng.sample(range(1, sections + 1), per_student)]
+        t, inserted = _time(enrollment.import_enrollments, rows)
+        print(f"  import  {inserted:>8} rows   {t:7.3f}s")
+        t, masks = _time(enrollment.load_section_masks)
+        print(f"  masks   {sections:>8} sections {t:7.3f}s")
+        exams = [(f"2025-12-{1 + rng.randrange(days):02d}", rng.choice(SLOTS), f"SUBJ {sec}", "",
+                  "f", "p", "r", sec, sec) for sec in range(1, sections + 1)]
+        t, clashes = _time(enrollment.detect_student_conflicts, None, exams, masks)
+        print(f"  detect  {len(exams):>8} exams    {t:7.3f}s  ({len(clashes)} student/day clashes)")
+    finally:
+        drop_temp_db(path)
+
+
+def populate_period(n_subjects, n_sections=None, n_instructors=None, n_rooms=None,
+                    days=15, slots=SLOTS, students=0, irregular=0.05, seed=0):
+    """
+    Fills the current (temp) database with a synthetic term: subjects with
+    one section each, instructors, rooms, time slots, optional enrollments
+    (a fraction `irregular` of students also take a second section),
+    and one exam period of `days` days starting 2025-12-01. Returns its period_id.
+    """
+    rng = random.Random(seed)
+    n_sections = n_sections or max(1, n_subjects // 5)
+    n_instructors = n_instructors or max(1, n_subjects // 4)
+    n_rooms = n_rooms or max(4, n_subjects // (days * len(slots)) * 3)
+    q = scheduler.db_execute
+    for s in range(1, n_sections + 1):
+        q("INSERT INTO sections (section_id, section_name, year_level) VALUES (?, ?, ?)", (s, f"SEC {s}", 1 + s % 4))
+    for i in range(n_instructors):
+        q("INSERT INTO accounts (username, password, name, department, role) VALUES (?, 'x', ?, 'Dept', 'Faculty')",
+          (f"fac{i}", f"Instructor {i}"))
+    for r in range(n_rooms):
+        q("INSERT INTO rooms (room_label, capacity) VALUES (?, ?)", (f"Room {r}", rng.choice((30, 40, 50, 60, 120))))
+    for slot in slots:
+        q("INSERT INTO time_slots (slot_label) VALUES (?)", (slot,))
+    with closing(sqlite3.connect(scheduler.DB_NAME)) as conn, conn:
+        conn.executemany("INSERT INTO subjects (code, title, orig_time, instructor, section_name) VALUES (?, ?, '', ?, ?)",
+                         [(f"SUBJ {i}", f"Subject {i}", f"Instructor {rng.randrange(n_instructors)}",
+                           f"SEC {1 + rng.randrange(n_sections)}") for i in range(n_subjects)])
+        # Students belong to a home section; a few are irregular and also take a nearby one
+        rows = []
+        for s in range(students):
+            home = 1 + rng.randrange(n_sections)
+            rows.append((f"S{s}", home))
+            if rng.random() < irregular:
+                rows.append((f"S{s}", 1 + (home + rng.randrange(1, 10)) % n_sections))
+        conn.executemany("INSERT OR IGNORE INTO enrollments (student_id, section_id) VALUES (?, ?)", rows)
+    end = datetime.date(2025, 12, 1) + datetime.timedelta(days=days - 1)
+    return q("INSERT INTO exam_periods (semester, start_date, end_date, period_type) VALUES ('Bench', '2025-12-01', ?, 'Final Exams')",
+             (end.isoformat(),))
+
+
+def bench_autoschedule(sizes=(500, 1000, 3000)):
+    """DSATUR auto-scheduling of a whole period, including the write."""
+    import autoschedule
+    print("== Auto-scheduler (DSATUR) ==")
+    print(f"{'subjects':>9} {'placed':>7} {'unplaced':>9} {'seconds':>8}")
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            pid = populate_period(n, days=15, students=n * 10)
+            result = autoschedule.schedule_period(pid, skip_weekdays=())
+            print(f"{n:>9} {len(result['placed']):>7} {len(result['unplaced']):>9} {result['seconds']:8.3f}")
+        finally:
+            drop_temp_db(path)
+
+
+def bench_overlapping_slots(sizes=(500, 1000, 3000)):
+    """Auto-scheduling onto a grid whose slots overlap in time, checked with detect_all_conflicts()."""
+    import autoschedule
+    print("== Auto-scheduler, overlapping slots ==")
+    print(f"{'subjects':>9} {'placed':>7} {'unplaced':>9} {'conflicts':>10} {'seconds':>8}")
+    slots = ["7:30-9:30 AM", "8:00-10:00 AM", "10:00-12:00 PM", "11:00-1:00 PM", "1:00-3:00 PM"]
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            pid = populate_period(n, days=15, slots=slots, students=n * 10)
+            result = autoschedule.schedule_period(pid, skip_weekdays=())
+            conflicts = sum(len(pairs) for pairs in detect_all_conflicts(pid).values())
+            print(f"{n:>9} {len(result['placed']):>7} {len(result['unplaced']):>9} {conflicts:>10} "
+                  f"{result['seconds']:8.3f}")
+            assert conflicts == 0, "schedule_period() booked overlapping slots together"
+        finally:
+            drop_temp_db(path)
+
+
+def bench_room_allocation(exams_per_slot=(100, 300, 600), rooms_per_slot_factor=1.2):
+    """Capacity-aware room matching with hundreds of rooms per (date, slot)."""
+    import room_allocator
+    print("== Room allocation ==")
+    print(f"{'per slot':>9} {'rooms':>6} {'exams':>6} {'unsat':>6} {'seconds':>8}")
+    for per_slot in exams_per_slot:
+        path = use_temp_db()
+        try:
+            days = 5
+            n = per_slot * days * len(SLOTS)
+            pid = populate_period(n, n_sections=n, n_rooms=int(per_slot * rooms_per_slot_factor),
+                                  days=days, students=n * 35, irregular=0)
+            autoschedule_result = __import__("autoschedule").schedule_period(pid, skip_weekdays=())
+            result = room_allocator.allocate_rooms(pid)
+            print(f"{per_slot:>9} {int(per_slot * rooms_per_slot_factor):>6} {len(autoschedule_result['placed']):>6} "
+                  f"{len(result['unsatisfied']):>6} {result['seconds']:8.3f}")
+        finally:
+            drop_temp_db(path)
+
+
+def bench_proctor_assignment(sizes=(500, 1000, 3000), proctors_per_exam=0.2, daily_cap=3):
+    """Proctor assignment for a whole period after auto-scheduling it."""
+    import autoschedule
+    import proctor_assignment
+    print("== Proctor assignment ==")
+    print(f"{'exams':>6} {'proctors':>8} {'max load':>8} {'unassigned':>10} {'seconds':>8}")
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            pid = populate_period(n, days=10)
+            autoschedule.schedule_period(pid, skip_weekdays=())
+            pool = [f"Proctor {i}" for i in range(int(n * proctors_per_exam))]
+            result = proctor_assignment.assign_proctors(pid, proctors=pool, daily_cap=daily_cap)
+            print(f"{len(result['assigned']) + len(result['unassigned']):>6} {len(pool):>8} "
+                  f"{result['max_load']:>8} {len(result['unassigned']):>10} {result['seconds']:8.3f}")
+        finally:
+            drop_temp_db(path)
+
+
+def bench_optimizer(n=1000, budgets=(0.5, 1.0, 2.0, 4.0)):
+    """Soft cost reached by the annealer under growing time budgets."""
+    import autoschedule
+    import optimizer
+    import room_allocator
+    print("== Optimizer (simulated annealing) ==")
+    path = use_temp_db()
+    try:
+        pid = populate_period(n, days=10, students=n * 20)
+        autoschedule.schedule_period(pid, skip_weekdays=())
+        room_allocator.allocate_rooms(pid)
+        snap = optimizer.load_snapshot(pid, skip_weekdays=())
+        print(f"{'budget':>7} {'iterations':>10} {'initial':>9} {'best':>9} {'seconds':>8}")
+        for budget in budgets:
+            result = optimizer.anneal(snap, iterations=10**9, time_limit=budget)
+            print(f"{budget:>7} {result['iterations']:>10} {result['initial_cost']:9.1f} "
+                  f"{result['cost']:9.1f} {result['seconds']:8.3f}")
+    finally:
+        drop_temp_db(path)
+
+
+def bench_multi_start(n=1000, worker_counts=(1, 2, 4, 8, 16), starts=16, iterations=50_000):
+    """Scaling of parallel restarts: the same 16 seeded runs spread over more workers."""
+    import autoschedule
+    import optimizer
+    print(f"== Multi-start optimizer ({os.cpu_count()} CPUs) ==")
+    path = use_temp_db()
+    try:
+        pid = populate_period(n, days=10, students=n * 20)
+        autoschedule.schedule_period(pid, skip_weekdays=())
+        snap = optimizer.load_snapshot(pid, skip_weekdays=())
+        print(f"{'workers':>7} {'seconds':>8} {'speedup':>8} {'efficiency':>10} {'best':>9}")
+        base = None
+        for workers in worker_counts:
+            result = optimizer.multi_start(snap, starts=starts, workers=workers, iterations=iterations)
+            base = base or result["wall_seconds"]
+            speedup = base / result["wall_seconds"]
+            print(f"{workers:>7} {result['wall_seconds']:8.2f} {speedup:8.2f} "
+                  f"{speedup / workers:10.0%} {result['cost']:9.1f}")
+    finally:
+        drop_temp_db(path)
+
+
+def bench_suggest(sizes=(1000, 3000, 5000), queries=200):
+    """Latency of slot suggestions: bitmap rebuild after a write, then cached queries."""
+    import autoschedule
+    import suggest
+    print("== Slot suggestions ==")
+    print(f"{'exams':>6} {'rebuild ms':>10} {'query ms':>9} {'p95 ms':>7}")
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            pid = populate_period(n, days=10, n_rooms=n // 10, students=n * 20)
+            autoschedule.schedule_period(pid, skip_weekdays=())
+            exams = scheduler.list_exams(pid)
+            rebuild, _ = _time(suggest.suggester.rebuild, pid)
+            rng = random.Random(0)
+            times = []
+            for _ in range(queries):
+                exam = rng.choice(exams)
+                times.append(_time(suggest.suggest_slots, pid, exam[7], exam[4], exam[5])[0])
+            times.sort()
+            print(f"{len(exams):>6} {rebuild * 1000:10.2f} {sum(times) / len(times) * 1000:9.3f} "
+                  f"{times[int(len(times) * 0.95)] * 1000:7.3f}")
+        finally:
+            drop_temp_db(path)
+
+
+def bench_repair(sizes=(1000, 3000, 5000), days=12):
+    """Closing one room and one (date, slot): time should follow the exams hit, not the period size."""
+    import autoschedule
+    import repair
+    import room_allocator
+    print("== Closure repair ==")
+    print(f"{'exams':>6} {'closure':>10} {'hit':>5} {'moved':>6} {'unplaced':>8} {'seconds':>8}")
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            pid = populate_period(n, days=days, students=n * 20)
+            autoschedule.schedule_period(pid, skip_weekdays=())
+            room_allocator.allocate_rooms(pid)
+            closures = {"room": {"rooms": ["Room 0"]},
+                        "date+slot": {"date_slots": [("2025-12-05", SLOTS[0])]}}
+            for name, closure in closures.items():
+                result = repair.repair_closures(pid, dry_run=True, skip_weekdays=(), **closure)
+                hit = len(result["moved"]) + len(result["unplaced"])
+                print(f"{n:>6} {name:>10} {hit:>5} {len(result['moved']):>6} "
+                      f"{len(result['unplaced']):>8} {result['seconds']:8.3f}")
+        finally:
+            drop_temp_db(path)
+
+
+def bench_scoring(sizes=(1000, 5000)):
+    """Full student-load scoring of a period, then the incremental update after one edit."""
+    import autoschedule
+    import scoring
+    print("== Student-load scoring ==")
+    print(f"{'exams':>6} {'full ms':>8} {'after edit ms':>13} {'penalty':>8} {'with TBA ms':>11}")
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            pid = populate_period(n, days=10, students=n * 20)
+            autoschedule.schedule_period(pid, skip_weekdays=())
+            full, _ = _time(scoring.scores.rebuild, pid)
+            exams = scheduler.list_exams(pid)
+            exam = exams[0]
+            scheduler.update_exam(exam[8], exam[0], SLOTS[-1], exam[5], exam[6])
+            after_edit, result = _time(scoring.score_period, pid)
+            # A free-text slot label next to readable ones forces a rebuild with mixed lanes
+            exam = exams[1]
+            scheduler.update_exam(exam[8], exam[0], "TBA", exam[5], exam[6])
+            mixed, _ = _time(scoring.score_period, pid)
+            print(f"{n:>6} {full * 1000:8.2f} {after_edit * 1000:13.3f} {result['penalty']:8.1f} "
+                  f"{mixed * 1000:11.2f}")
+        finally:
+            drop_temp_db(path)
+
+
+def bench_feasibility(sizes=(1000, 3000, 5000)):
+    """Lower-bound analysis of a term before anything is scheduled."""
+    import feasibility
+    print("== Feasibility analysis ==")
+    print(f"{'subjects':>8} {'days':>5} {'available':>9} {'bound':>6} {'problems':>8} {'seconds':>8}")
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            populate_period(n, days=10, students=n * 20, irregular=0.2)
+            for days in (10, 3):
+                end = (datetime.date(2025, 12, 1) + datetime.timedelta(days=days - 1)).isoformat()
+                result = feasibility.analyze_feasibility("2025-12-01", end, skip_weekdays=())
+                print(f"{n:>8} {days:>5} {result['slots_available']:>9} {result['lower_bound']:>6} "
+                      f"{len(result['problems']):>8} {result['seconds']:8.3f}")
+        finally:
+            drop_temp_db(path)
+
+
+def bench_warm_start(sizes=(1000, 3000)):
+    """Next term's finals scheduled cold and warm-started from the previous term."""
+    import autoschedule
+    print("== Warm-start scheduling ==")
+    print(f"{'subjects':>8} {'mode':>5} {'kept':>5} {'placed':>6} {'unplaced':>8} {'conflicts':>9} {'seconds':>8}")
+    for n in sizes:
+        path = use_temp_db()
+        try:
+            previous = populate_period(n, days=12, slots=SLOTS + ["8:00-10:00 AM"], students=n * 20)
+            autoschedule.schedule_period(previous)
+            for mode, seed in (("cold", None), ("warm", previous)):
+                pid = scheduler.db_execute(
+                    "INSERT INTO exam_periods (semester, start_date, end_date, period_type) "
+                    "VALUES ('Next', '2026-05-04', '2026-05-15', 'Final Exams')")
+                result = autoschedule.schedule_period(pid, warm_start_from=seed)
+                conflicts = sum(len(pairs) for pairs in detect_all_conflicts(pid).values())
+                print(f"{n:>8} {mode:>5} {result['kept']:>5} {len(result['placed']):>6} "
+                      f"{len(result['unplaced']):>8} {conflicts:>9} {result['seconds']:8.3f}")
+                assert conflicts == 0, "warm start kept exams in overlapping slots"
+        finally:
+            drop_temp_db(path)
+
+
+def connect_per_call_query(sql, params=()):
+    """The original db_query, opening a new connection for every call; kept for comparison."""
+    with closing(sqlite3.connect(scheduler.DB_NAME, timeout=30)) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def connect_per_call_execute(sql, params=()):
+    """The original db_execute; kept for comparison."""
+    with closing(sqlite3.connect(scheduler.DB_NAME, timeout=30)) as conn, conn:
+        return conn.execute(sql, params).lastrowid
+
+
+def bench_validation(n=3000, candidates=300):
+    """
+    validate_and_save_exam() dry runs on random candidates, checked against
+    check_new_exam_conflicts(): both must report the same conflicts.
+    """
+    import autoschedule
+    import validation
+    from conflict_checker import check_new_exam_conflicts
+    print("== Exam validation ==")
+    path = use_temp_db()
+    try:
+        pid = populate_period(n, days=10)
+        autoschedule.schedule_period(pid, skip_weekdays=())
+        exams = scheduler.list_exams(pid)
+        sections = scheduler.db_query("SELECT section_id, section_name FROM sections")
+        rng = random.Random(2)
+        elapsed, found = 0.0, 0
+        for i in range(candidates):
+            section_id, section_name = rng.choice(sections)
+            cand = (rng.choice(exams)[scheduler.DATE], rng.choice(SLOTS), f"SUBJ {i}", f"Subject {i}",
+                    rng.choice(exams)[INSTRUCTOR], rng.choice(exams)[PROCTOR], rng.choice(exams)[ROOM], pid, section_id)
+            expected = [(kind, exam[scheduler.EXAM_ID]) for kind, exam in check_new_exam_conflicts(pid, cand)]
+            seconds, result = _time(validation.validate_and_save_exam, pid, cand[4], cand[2], cand[3],
+                                    section_name, cand[0], cand[1], cand[5], cand[6], None, True)
+            elapsed += seconds
+            got = [(v["code"][:-len("_conflict")], v["exam"][scheduler.EXAM_ID])
+                   for v in result["violations"] if v["kind"] == "conflict"]
+            assert got == expected, f"candidate {i}: {got} != {expected}"
+            found += len(got)
+        print(f"  {candidates} candidates, {found} conflicts, all matching check_new_exam_conflicts; "
+              f"{elapsed / candidates * 1000:.3f} ms per validation")
+    finally:
+        drop_temp_db(path)
+
+
+def bench_connections(n=3000, calls=5000):
+    """Small queries and writes per second, connecting per call versus the pooled connection."""
+    import autoschedule
+    print("== Connection reuse ==")
+    print(f"{'workload':>16} {'per call q/s':>12} {'pooled q/s':>10} {'speedup':>8}")
+    path = use_temp_db()
+    try:
+        pid = populate_period(n, days=10)
+        autoschedule.schedule_period(pid, skip_weekdays=())
+        ids = [r[0] for r in scheduler.db_query("SELECT id FROM exams")]
+        rng = random.Random(0)
+        picks = [rng.choice(ids) for _ in range(calls)]
+        get_sql = f"SELECT {scheduler.EXAM_COLUMNS}, period_id FROM exams WHERE id=?"
+        day_sql = f"SELECT {scheduler.EXAM_COLUMNS} FROM exams WHERE period_id=? AND exam_date=?"
+        set_sql = ("INSERT INTO settings (key, value) VALUES (?, ?) "
+                   "ON CONFLICT(key) DO UPDATE SET value=excluded.value")
+        workloads = [
+            ("get_exam", get_sql, [(i,) for i in picks]),
+            ("exams of a day", day_sql, [(pid, f"2025-12-{1 + i % 10:02d}") for i in range(calls // 10)]),
+            ("settings write", set_sql, [("bench", str(i)) for i in range(calls // 10)]),
+        ]
+        for name, sql, params in workloads:
+            slow_fn, fast_fn = ((connect_per_call_execute, scheduler.db_execute) if name.endswith("write")
+                                else (connect_per_call_query, scheduler.db_query))
+            slow, _ = _time(lambda: [slow_fn(sql, p) for p in params])
+            fast, _ = _time(lambda: [fast_fn(sql, p) for p in params])
+            print(f"{name:>16} {len(params) / slow:12.0f} {len(params) / fast:10.0f} {slow / fast:7.1f}x")
+    finally:
+        drop_temp_db(path)
+
+
+def bench_concurrent_access(n=3000, readers=4, seconds=2.0):
+    """Readers listing exams while a writer keeps updating them, each on its own thread."""
+    import threading
+    import autoschedule
+    print("== Concurrent readers and a writer (WAL) ==")
+    path = use_temp_db()
+    try:
+        pid = populate_period(n, days=10)
+        autoschedule.schedule_period(pid, skip_weekdays=())
+        ids = [r[0] for r in scheduler.db_query("SELECT id FROM exams")]
+        scheduler.reset_lock_wait_metrics()
+        stop = time.perf_counter() + seconds
+        done = [0] * (readers + 1)  # one slot per thread; index `readers` is the writer
+
+        def read(slot):
+            while time.perf_counter() < stop:
+                scheduler.list_exams(pid)
+                done[slot] += 1
+
+        def write(slot):
+            rng = random.Random(1)
+            while time.perf_counter() < stop:
+                scheduler.db_execute("UPDATE exams SET proctor=? WHERE id=?",
+                                     (f"Proctor {rng.randrange(100)}", rng.choice(ids)))
+                done[slot] += 1
+
+        threads = ([threading.Thread(target=read, args=(i,)) for i in range(readers)]
+                   + [threading.Thread(target=write, args=(readers,))])
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        counts = {"reads": sum(done[:readers]), "writes": done[readers]}
+        lock = scheduler.lock_wait_metrics()
+        print(f"{readers} readers: {counts['reads'] / seconds:.0f} listings/s; "
+              f"writer: {counts['writes'] / seconds:.0f} writes/s; "
+              f"lock waits {lock['waited']}/{lock['writes']}, max {lock['max_wait_seconds'] * 1000:.1f} ms, "
+              f"retries {lock['retries']}")
+    finally:
+        drop_temp_db(path)
+
+
+def bench_bulk_writes(n=100_000, single=1000):
+    """add_exams / update_exams / delete_exams on n rows, against add_exam one row at a time."""
+    print("== Bulk exam writes ==")
+    path = use_temp_db()
+    try:
+        rows = [(e[4], e[2], e[3], e[0], e[1], e[5], e[6], 1, e[7]) for e in make_exams(n)]
+        per_row, _ = _time(lambda: [scheduler.add_exam(*row) for row in rows[:single]])
+        print(f"  {'add_exam':<13} {single:>7} rows {per_row:8.3f}s {single / per_row:9.0f} rows/s")
+        scheduler.db_execute("DELETE FROM exams")
+
+        seconds, ids = _time(scheduler.add_exams, rows)
+        print(f"  {'add_exams':<13} {n:>7} rows {seconds:8.3f}s {n / seconds:9.0f} rows/s")
+        moves = [(exam_id, SLOTS[exam_id % len(SLOTS)]) for exam_id in ids]
+        seconds, _ = _time(lambda: scheduler.update_exams(moves, columns=("exam_slot",)))
+        print(f"  {'update_exams':<13} {n:>7} rows {seconds:8.3f}s {n / seconds:9.0f} rows/s")
+        seconds, _ = _time(scheduler.delete_exams, ids)
+        print(f"  {'delete_exams':<13} {n:>7} rows {seconds:8.3f}s {n / seconds:9.0f} rows/s")
+    finally:
+        drop_temp_db(path)
+
+
+def use_temp_db():
+    """Points scheduler at a fresh database file and returns its path."""
+    scheduler.close_connections()
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    scheduler.DB_NAME = path
+    scheduler.ensure_schema()
+    return path
+
+
+def drop_temp_db(path):
+    """Closes the connections to a use_temp_db() file and deletes it with its WAL files."""
+    scheduler.close_connections()
+    for name in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+# Hot queries that must be answered from an index, never by scanning exams
+PAGING_QUERIES = {
+    "next_exam_date": ("""
+        SELECT DISTINCT exam_date FROM exams
+        WHERE faculty_username=? AND period_id=? AND exam_date > ?
+        ORDER BY exam_date LIMIT 1
+    """, ("u", 1, "")),
+    "prev_admin_date": ("""
+        SELECT DISTINCT exam_date FROM exams
+        WHERE period_id=? AND exam_date < ?
+        ORDER BY exam_date DESC LIMIT 1
+    """, (1, "")),
+    "closed_room_exams": ("""
+        SELECT id FROM exams WHERE period_id=? AND room=? COLLATE NOCASE
+    """, (1, "")),
+    "exam_validation": ("""
+        SELECT id, room FROM exams WHERE period_id=? AND exam_date=?
+        UNION
+        SELECT id, room FROM exams WHERE period_id=? AND subject_code=? AND subject_description=?
+    """, (1, "", 1, "", "")),
+}
+
+
+def check_query_plans():
+    """Fails loudly if a conflict or paging query stops using its index."""
+    print("== EXPLAIN QUERY PLAN checks ==")
+    path = use_temp_db()
+    try:
+        plans = {}
+        for kind in SQL_CONFLICT_KEYS:
+            plans[f"{kind} pairs"] = explain_sql_conflicts(kind)
+            plans[f"{kind} groups"] = explain_sql_conflicts(kind, grouped=True)
+        for name, (sql, params) in PAGING_QUERIES.items():
+            plans[name] = [r[-1] for r in scheduler.db_query("EXPLAIN QUERY PLAN " + sql, params)]
+        for name, plan in plans.items():
+            detail = " | ".join(plan)
+            assert not any(step.startswith("SCAN") for step in plan), f"{name}: full scan: {detail}"
+            assert all("INDEX" in step for step in plan if step.startswith("SEARCH")), f"{name}: {detail}"
+            print(f"  ok  {name:<18} {detail}")
+    finally:
+        drop_temp_db(path)
+
+
+if __name__ == "__main__":
+    check_query_plans()
+    bench_bucket_engine()
+    bench_engines()
+    bench_enrollments()
+    bench_autoschedule()
+    bench_overlapping_slots()
+    bench_room_allocation()
+    bench_proctor_assignment()
+    bench_optimizer()
+    bench_multi_start()
+    bench_suggest()
+    bench_repair()
+    bench_scoring()
+    bench_feasibility()
+    bench_warm_start()
+    bench_validation()
+    bench_connections()
+    bench_concurrent_access()
+    bench_bulk_writes()
@@ -1,29 +1,64 @@
 """
 Conflict Checker Module
 -----------------------
-Handles detection of exam scheduling conflicts:
+Handles detection of exam scheduling conflicts (same date, overlapping slot):
 - Room conflicts
 - Proctor conflicts
 - Instructor conflicts
 - Section conflicts
 """
 
-from scheduler import list_exams
+import time
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # optional: only used for very large periods
+    np = None
+
+import occupancy
+from timeslots import slot_lane, slots_overlap, overlapping_pairs
+from scheduler import (
+    list_exams, db_iter, db_query, EXAM_COLUMNS,
+    DATE, SLOT, INSTRUCTOR, PROCTOR, ROOM, SECTION, EXAM_ID
+)
+
+# -------------------------------
+# Bucket engine
+# -------------------------------
+
+def find_conflicts(exams, column, ignore_case=True):
+    """
+    Returns every pair of exams that share the same value in `column` on the
+    same exam_date with overlapping exam_slot times.
+    Exams are grouped once into (key, exam_date) buckets and each bucket is
+    swept in start-time order, so the cost is linear in the number of exams
+    plus the number of conflicting pairs.
+    Pairs come back in the same order as a nested i < j loop over `exams`.
+    """
+    buckets = defaultdict(list)
+    for idx, exam in enumerate(exams):
+        key = exam[column].lower() if ignore_case else exam[column]
+        lane, start, end = slot_lane(exam[SLOT])
+        buckets[(key, exam[DATE], lane)].append((start, end, idx))
+    return _pairs_from_buckets(exams, buckets)
+
+
+def _pairs_from_buckets(exams, buckets):
+    index_pairs = []
+    for members in buckets.values():
+        if len(members) > 1:
+            index_pairs.extend(overlapping_pairs(members))
+    index_pairs.sort()
+    return [(exams[i], exams[j]) for i, j in index_pairs]
+
 
 # -------------------------------
 # Room Conflicts
 # -------------------------------
 
 def check_room_conflicts(period_id=None):
-    exams = list_exams(period_id)
-    conflicts = []
-    for i in range(len(exams)):
-        for j in range(i+1, len(exams)):
-            if (exams[i][6].lower() == exams[j][6].lower() and  # room
-                exams[i][0] == exams[j][0] and                 # exam_date
-                exams[i][1] == exams[j][1]):                   # exam_slot
-                conflicts.append((exams[i], exams[j]))
-    return conflicts
+    return find_conflicts(list_exams(period_id), ROOM)
 
 
 # -------------------------------
@@ -31,15 +66,7 @@ def check_room_conflicts(period_id=None):
 # -------------------------------
 
 def check_proctor_conflicts(period_id=None):
-    exams = list_exams(period_id)
-    conflicts = []
-    for i in range(len(exams)):
-        for j in range(i+1, len(exams)):
-            if (exams[i][5].lower() == exams[j][5].lower() and  # proctor
-                exams[i][0] == exams[j][0] and                  # exam_date
-                exams[i][1] == exams[j][1]):                    # exam_slot
-                conflicts.append((exams[i], exams[j]))
-    return conflicts
+    return find_conflicts(list_exams(period_id), PROCTOR)
 
 
 # -------------------------------
@@ -47,15 +74,7 @@ def check_proctor_conflicts(period_id=None):
 # -------------------------------
 
 def check_instructor_conflicts(period_id=None):
-    exams = list_exams(period_id)
-    conflicts = []
-    for i in range(len(exams)):
-        for j in range(i+1, len(exams)):
-            if (exams[i][4].lower() == exams[j][4].lower() and  # faculty_username
-                exams[i][0] == exams[j][0] and                  # exam_date
-                exams[i][1] == exams[j][1]):                    # exam_slot
-                conflicts.append((exams[i], exams[j]))
-    return conflicts
+    return find_conflicts(list_exams(period_id), INSTRUCTOR)
 
 
 # -------------------------------
@@ -63,15 +82,69 @@ def check_instructor_conflicts(period_id=None):
 # -------------------------------
 
 def check_section_conflicts(period_id=None):
-    exams = list_exams(period_id)
-    conflicts = []
-    for i in range(len(exams)):
-        for j in range(i+1, len(exams)):
-            if (exams[i][7] == exams[j][7] and                # section_id
-                exams[i][0] == exams[j][0] and                # exam_date
-                exams[i][1] == exams[j][1]):                  # exam_slot
-                conflicts.append((exams[i], exams[j]))
-    return conflicts
+    return find_conflicts(list_exams(period_id), SECTION, ignore_case=False)
+
+
+# -------------------------------
+# SQL-side Conflicts
+# -------------------------------
+
+# Join/group key per conflict type; each one is backed by an index in scheduler.EXAM_INDEXES
+SQL_CONFLICT_KEYS = {
+    "room": "room COLLATE NOCASE",
+    "proctor": "proctor COLLATE NOCASE",
+    "instructor": "faculty_username COLLATE NOCASE",
+    "section": "section_id",
+}
+
+_EXAM_FIELDS = [c.strip() for c in EXAM_COLUMNS.split(",")]
+
+
+def _sql_pairs_query(kind):
+    key = SQL_CONFLICT_KEYS[kind]
+    cols = ", ".join(f"{alias}.{c}" for alias in "ab" for c in _EXAM_FIELDS)
+    return f"""
+        SELECT {cols}
+        FROM exams a
+        JOIN exams b
+          ON b.period_id = a.period_id AND b.exam_date = a.exam_date
+         AND b.exam_slot = a.exam_slot AND b.{key} = a.{key} AND b.id > a.id
+        WHERE a.period_id = ?
+    """
+
+
+def _sql_groups_query(kind):
+    key = SQL_CONFLICT_KEYS[kind]
+    return f"""
+        SELECT exam_date, exam_slot, {key.split()[0]}, COUNT(*)
+        FROM exams
+        WHERE period_id = ?
+        GROUP BY exam_date, exam_slot, {key}
+        HAVING COUNT(*) > 1
+    """
+
+
+def iter_sql_conflicts(period_id, kind):
+    """
+    Yields (exam_a, exam_b) conflict pairs of one kind ("room", "proctor",
+    "instructor", "section") found by a self-join inside SQLite.
+    Slots are compared by label, not by time range.
+    Rows stream from the cursor; exam_a is always the one with the lower id.
+    """
+    width = len(_EXAM_FIELDS)
+    for row in db_iter(_sql_pairs_query(kind), (period_id,)):
+        yield row[:width], row[width:]
+
+
+def iter_sql_conflict_groups(period_id, kind):
+    """Yields (exam_date, exam_slot, key, exam_count) for every over-booked bucket."""
+    yield from db_iter(_sql_groups_query(kind), (period_id,))
+
+
+def explain_sql_conflicts(kind, grouped=False):
+    """Returns the EXPLAIN QUERY PLAN detail lines for one conflict query."""
+    sql = _sql_groups_query(kind) if grouped else _sql_pairs_query(kind)
+    return [row[-1] for row in db_query("EXPLAIN QUERY PLAN " + sql, (0,))]
 
 
 # -------------------------------
@@ -81,48 +154,227 @@ def check_section_conflicts(period_id=None):
 def check_new_exam_conflicts(period_id, new_exam, exclude_id=None):
     """
     Checks if a new exam conflicts with existing exams in the period.
-    new_exam: tuple (date, slot, subject_code, subject_description, faculty_username, proctor, room, section_id)
+    new_exam: tuple (date, slot, subject_code, subject_description, faculty_username, proctor, room, [period_id,] section_id)
     exclude_id: optional exam ID to exclude from checks (useful for editing)
     Returns a list of conflict types and conflicting exams, e.g., [("room", existing_exam), ...]
+    Answered from the period's occupancy index instead of re-reading the exams table.
+    """
+    return occupancy.index.conflicts_for(period_id, new_exam, exclude_id)
+
+
+# -------------------------------
+# Batch Validation of Candidate Exams
+# -------------------------------
+
+def check_new_exams_batch(period_id, candidates):
+    """
+    Validates many proposed exams at once, against the existing schedule and
+    against each other.
+    candidates: iterable of tuples shaped like new_exam in check_new_exam_conflicts
+    Returns one list per candidate, in input order, of (conflict_type, other) where
+    other is an existing exam row, or the int index of another candidate.
+    Cost is one period load plus work proportional to the conflicts found.
+    """
+    existing = occupancy.index
+    existing.ensure(period_id)
+    batch = occupancy.OccupancyIndex()  # candidates accepted so far, ids -1, -2, ...
+    results = []
+    for i, cand in enumerate(candidates):
+        found = list(existing.conflicts_with(cand))
+        for conflict_type, row in batch.conflicts_with(cand):
+            j = -1 - row[EXAM_ID]
+            found.append((conflict_type, j))
+            results[j].append((conflict_type, i))
+        results.append(found)
+        batch.add_row((cand[0], cand[1], cand[2], cand[3], cand[4], cand[5], cand[6], cand[-1], -1 - i))
+    return results
+
+
+# -------------------------------
+# All Conflicts (single load, single pass)
+# -------------------------------
+
+# Cumulative timing counters for detect_all_conflicts(), in seconds.
+# "last" holds the breakdown of the most recent run.
+detector_stats = {
+    "runs": 0,
+    "exams": 0,
+    "load_time": 0.0,
+    "bucket_time": 0.0,
+    "pair_time": 0.0,
+    "last": {},
+}
+
+
+def reset_detector_stats():
+    detector_stats.update(runs=0, exams=0, load_time=0.0, bucket_time=0.0, pair_time=0.0, last={})
+
+
+# Periods at least this big use the NumPy bucketing when NumPy is importable
+NUMPY_MIN_EXAMS = 20000
+
+
+def _bucket_all(exams, engine="auto"):
+    """
+    One pass over the exams, filling the (key, date, lane) buckets of every conflict type.
+    engine: "python", "numpy", or "auto" (NumPy for periods of NUMPY_MIN_EXAMS or more).
+    """
+    if engine == "numpy" or (engine == "auto" and np is not None and len(exams) >= NUMPY_MIN_EXAMS):
+        if np is None:
+            raise RuntimeError("NumPy is not installed.")
+        return _bucket_all_numpy(exams)
+    buckets = {kind: defaultdict(list) for kind in ("room", "proctor", "instructor", "section")}
+    rooms, proctors, instructors, sections = buckets.values()
+    for idx, exam in enumerate(exams):
+        lane, start, end = slot_lane(exam[SLOT])
+        when = (exam[DATE], lane)
+        member = (start, end, idx)
+        rooms[(exam[ROOM].lower(), *when)].append(member)
+        proctors[(exam[PROCTOR].lower(), *when)].append(member)
+        instructors[(exam[INSTRUCTOR].lower(), *when)].append(member)
+        sections[(exam[SECTION], *when)].append(member)
+    return buckets
+
+
+def _encode(values):
+    """Dictionary-encodes values into an int64 array of codes; returns (codes, distinct_count)."""
+    table = {v: i for i, v in enumerate(dict.fromkeys(values))}
+    codes = np.fromiter(map(table.__getitem__, values), dtype=np.int64, count=len(values))
+    return codes, max(len(table), 1)
+
+
+def _bucket_all_numpy(exams):
+    """
+    Vectorized _bucket_all(): every (key, date, lane) triple becomes one int64
+    composite key, a stable argsort lines equal keys up, and only runs longer
+    than one exam are turned back into Python buckets. Result has the same
+    shape as the pure-Python version, minus the single-exam buckets.
+    """
+    lanes = [slot_lane(e[SLOT]) for e in exams]
+    dates, n_dates = _encode([e[DATE] for e in exams])
+    lane_codes, n_lanes = _encode([l[0] for l in lanes])
+    date_lane = dates * n_lanes + lane_codes
+
+    buckets = {}
+    for kind, column, fold in (("room", ROOM, True), ("proctor", PROCTOR, True),
+                               ("instructor", INSTRUCTOR, True), ("section", SECTION, False)):
+        keys, _ = _encode([e[column].lower() for e in exams] if fold else [e[column] for e in exams])
+        composite = keys * (n_dates * n_lanes) + date_lane
+        order = np.argsort(composite, kind="stable")
+        ordered = composite[order]
+        bounds = np.flatnonzero(np.diff(ordered)) + 1
+        run_starts = np.concatenate(([0], bounds))
+        run_ends = np.concatenate((bounds, [len(ordered)]))
+        kind_buckets = {}
+        shared = run_ends - run_starts > 1
+        for lo, hi in zip(run_starts[shared].tolist(), run_ends[shared].tolist()):
+            members = order[lo:hi].tolist()
+            first = exams[members[0]]
+            key = first[column].lower() if fold else first[column]
+            kind_buckets[(key, first[DATE], lanes[members[0]][0])] = [lanes[i][1:] + (i,) for i in members]
+        buckets[kind] = kind_buckets
+    return buckets
+
+
+def detect_all_conflicts(period_id=None, exams=None, mode="python", engine="auto"):
+    """
+    Reads the period once and finds room, proctor, instructor and section
+    conflicts (same date, overlapping slot times) in a single traversal.
+    exams: optional rows already fetched with list_exams(); skips the query.
+    mode: "sql" runs the indexed self-join queries in SQLite instead of
+          loading the period into Python; it matches identical slot labels only.
+    engine: bucketing backend for mode="python", see _bucket_all().
+    Returns the same dict of pair lists as the individual checkers.
+    """
+    if mode == "sql":
+        return _detect_all_sql(period_id)
+
+    t0 = time.perf_counter()
+    if exams is None:
+        exams = list_exams(period_id)
+    t1 = time.perf_counter()
+
+    buckets = _bucket_all(exams, engine)
+    t2 = time.perf_counter()
+
+    result = {f"{kind}_conflicts": _pairs_from_buckets(exams, buckets[kind]) for kind in buckets}
+    t3 = time.perf_counter()
+
+    last = {"exams": len(exams), "load_time": t1 - t0, "bucket_time": t2 - t1, "pair_time": t3 - t2}
+    detector_stats["runs"] += 1
+    detector_stats["exams"] += len(exams)
+    for key in ("load_time", "bucket_time", "pair_time"):
+        detector_stats[key] += last[key]
+    detector_stats["last"] = last
+    return result
+
+
+def _detect_all_sql(period_id):
+    t0 = time.perf_counter()
+    result = {
+        f"{kind}_conflicts": list(iter_sql_conflicts(period_id, kind))
+        for kind in SQL_CONFLICT_KEYS
+    }
+    elapsed = time.perf_counter() - t0
+    detector_stats["runs"] += 1
+    detector_stats["load_time"] += elapsed
+    detector_stats["last"] = {"mode": "sql", "load_time": elapsed, "bucket_time": 0.0, "pair_time": 0.0}
+    return result
+
+
+# -------------------------------
+# Conflict Clusters
+# -------------------------------
+
+def detect_conflict_clusters(period_id=None, exams=None):
     """
-    exams = list_exams(period_id)
-    conflicts = []
-    for exam in exams:
-        # Skip the exam being edited
-        if exclude_id and exam[8] == exclude_id:  # Assuming exam[8] is the ID; adjust if needed
-            continue
-        
-        # Room conflict
-        if (exam[6].lower() == new_exam[6].lower() and 
-            exam[0] == new_exam[0] and 
-            exam[1] == new_exam[1]):
-            conflicts.append(("room", exam))
-        
-        # Proctor conflict
-        if (exam[5].lower() == new_exam[5].lower() and 
-            exam[0] == new_exam[0] and 
-            exam[1] == new_exam[1]):
-            conflicts.append(("proctor", exam))
-        
-        # Instructor conflict (only flag if different instructor)
-        if (exam[4].lower() != new_exam[4].lower() and 
-            exam[0] == new_exam[0] and 
-            exam[1] == new_exam[1]):
-            conflicts.append(("instructor", exam))
-        
-        # Section conflict
-        if (exam[7] == new_exam[7] and 
-            exam[0] == new_exam[0] and 
-            exam[1] == new_exam[1]):
-            conflicts.append(("section", exam))
-    
-    return conflicts
-
-
-def detect_all_conflicts(period_id=None):
+    Groups conflicting exams instead of listing every pair: one cluster per
+    resource, date and run of overlapping slots. 40 exams booked into one
+    room at one time give a single cluster of 40, not 780 pairs.
+    Returns a list of dicts:
+        {"type": "room", "key": "Auditorium", "date": "2025-12-17",
+         "slots": ["7:30-9:30 AM"], "exams": [row, ...]}
+    Use iter_cluster_pairs() when the individual pairs are needed.
+    """
+    if exams is None:
+        exams = list_exams(period_id)
+    key_column = {"room": ROOM, "proctor": PROCTOR, "instructor": INSTRUCTOR, "section": SECTION}
+    clusters = []
+    for kind, buckets in _bucket_all(exams).items():
+        for (_key, date, _lane), members in buckets.items():
+            if len(members) < 2:
+                continue
+            # Connected runs of an interval graph: a new run starts once a
+            # start passes the furthest end seen so far
+            run, run_end = [], None
+            for start, end, idx in sorted(members):
+                if run and start >= run_end:
+                    if len(run) > 1:
+                        clusters.append(_make_cluster(kind, key_column[kind], date, exams, run))
+                    run, run_end = [], None
+                run.append(idx)
+                run_end = end if run_end is None else max(run_end, end)
+            if len(run) > 1:
+                clusters.append(_make_cluster(kind, key_column[kind], date, exams, run))
+    clusters.sort(key=lambda c: (c["date"], slot_lane(c["slots"][0])[1], c["type"]))
+    return clusters
+
+
+def _make_cluster(kind, column, date, exams, indexes):
+    rows = [exams[i] for i in sorted(indexes)]
     return {
-        "room_conflicts": check_room_conflicts(period_id),
-        "proctor_conflicts": check_proctor_conflicts(period_id),
-        "instructor_conflicts": check_instructor_conflicts(period_id),
-        "section_conflicts": check_section_conflicts(period_id)
+        "type": kind,
+        "key": rows[0][column],
+        "date": date,
+        "slots": sorted({r[SLOT] for r in rows}, key=lambda s: slot_lane(s)[1:]),
+        "exams": rows,
     }
+
+
+def iter_cluster_pairs(cluster):
+    """Lazily yields the (exam_a, exam_b) pairs inside a cluster whose slots overlap."""
+    rows = cluster["exams"]
+    for i in range(len(rows)):
+        for j in range(i + 1, len(rows)):
+            if slots_overlap(rows[i][SLOT], rows[j][SLOT]):
+                yield rows[i], rows[j]
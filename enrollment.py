@@ -0,0 +1,133 @@
+"""
+Enrollment Module
+-----------------
+Student <-> section enrollments and the student-level conflict check:
+- Bulk import (rows or CSV) in a single transaction
+- Per-section student bitsets (Python ints, one bit per student)
+- Students with two overlapping exams, found by ANDing section bitsets
+"""
+
+import csv
+from collections import defaultdict
+
+import scheduler
+from scheduler import db_query, list_exams, DATE, SLOT, SECTION, EXAM_ID
+from timeslots import slot_lane
+
+
+# -------------------------------
+# Import
+# -------------------------------
+
+def import_enrollments(rows, replace=False):
+    """
+    Bulk-loads (student_id, section_id) pairs in one transaction.
+    replace: clear existing enrollments first.
+    Returns the number of new enrollments stored (duplicates are ignored).
+    """
+    with scheduler.write_transaction() as conn:
+        if replace:
+            conn.execute("DELETE FROM enrollments")
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO enrollments (student_id, section_id) VALUES (?, ?)",
+            ((str(student).strip(), int(section)) for student, section in rows),
+        )
+        return conn.total_changes - before
+
+
+def import_enrollments_csv(path, replace=False):
+    """
+    Imports a CSV with columns student_id and section, where section is a
+    section name (e.g. "BSCE 3A") or a numeric section_id.
+    Raises ValueError listing any section names that do not exist.
+    """
+    by_name = dict(db_query("SELECT section_name, section_id FROM sections"))
+    rows, unknown = [], set()
+    with open(path, newline="", encoding="utf-8") as f:
+        for rec in csv.DictReader(f):
+            section = rec["section"].strip()
+            section_id = by_name.get(section, section if section.isdigit() else None)
+            if section_id is None:
+                unknown.add(section)
+                continue
+            rows.append((rec["student_id"], section_id))
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+    return import_enrollments(rows, replace=replace)
+
+
+# -------------------------------
+# Section bitsets
+# -------------------------------
+
+def load_section_masks():
+    """
+    Returns (masks, students): masks maps str(section_id) to an int whose bit i
+    is set when students[i] is enrolled in that section.
+    """
+    student_bit = {}
+    bits = defaultdict(list)
+    for section_id, student_id in db_query("SELECT section_id, student_id FROM enrollments"):
+        bits[str(section_id)].append(student_bit.setdefault(student_id, len(student_bit)))
+
+    nbytes = (len(student_bit) + 7) // 8
+    masks = {}
+    for section, positions in bits.items():
+        buf = bytearray(nbytes)
+        for i in positions:
+            buf[i >> 3] |= 1 << (i & 7)
+        masks[section] = int.from_bytes(buf, "little")
+    return masks, list(student_bit)
+
+
+def _set_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# -------------------------------
+# Student Conflicts
+# -------------------------------
+
+def detect_student_conflicts(period_id=None, exams=None, masks=None):
+    """
+    Finds students who sit two exams at overlapping times on the same date.
+    masks: optional (masks, students) from load_section_masks().
+    Returns a list of {"student_id", "date", "exams": [row, ...]}.
+    """
+    if exams is None:
+        exams = list_exams(period_id)
+    masks, students = masks or load_section_masks()
+
+    by_date = defaultdict(list)
+    for exam in exams:
+        mask = masks.get(str(exam[SECTION]))
+        if mask:
+            lane, start, end = slot_lane(exam[SLOT])
+            by_date[(exam[DATE], lane)].append((start, end, exam, mask))
+
+    found = defaultdict(dict)  # (student_id, date) -> {exam_id: row}
+    for (date, _lane), items in by_date.items():
+        items.sort(key=lambda it: (it[0], it[1]))
+        active = []
+        for start, end, exam, mask in items:
+            active = [a for a in active if a[1] > start]
+            running = 0
+            for a in active:
+                running |= a[3]
+            clash = mask & running
+            for bit in _set_bits(clash):
+                hit = found[(students[bit], date)]
+                for a in active:
+                    if a[3] >> bit & 1:
+                        hit[a[2][EXAM_ID]] = a[2]
+                hit[exam[EXAM_ID]] = exam
+            active.append((start, end, exam, mask))
+
+    return [
+        {"student_id": student, "date": date, "exams": list(rows.values())}
+        for (student, date), rows in sorted(found.items())
+    ]
@@ -0,0 +1,134 @@
+"""
+Feasibility Check
+-----------------
+Quick lower bounds, computed before any scheduling, that show a period is
+too short (or has too few slots or rooms) for the subjects to examine:
+- Largest clique found greedily in the section/instructor/student conflict
+  graph: those subjects all need different time slots
+- Exams per section and per instructor
+- Room count and room sizes against the number and size of the exams
+Every problem names the subjects behind it.
+"""
+
+import time
+from collections import defaultdict
+
+from scheduler import db_query
+from autoschedule import (SUNDAY, date_grid, load_subject_nodes,
+                          shared_student_sections, build_conflict_graph)
+from room_allocator import section_sizes, room_capacities
+from timeslots import slot_lane
+
+
+def _disjoint_slots(slots):
+    """Most slots of one day that can all be used at once (no two overlapping)."""
+    count, last_end = 0, None
+    for lane, start, end in sorted((slot_lane(s) for s in slots), key=lambda t: (t[0] or "", t[2])):
+        if lane is not None:
+            count += 1  # unreadable labels only clash with themselves
+        elif last_end is None or start >= last_end:
+            count, last_end = count + 1, end
+    return count
+
+
+def greedy_clique(adj, seeds=50, time_limit=0.05):
+    """
+    A large clique found greedily: from each of the `seeds` highest-degree
+    nodes, keep adding the candidate with the most neighbours among the
+    remaining candidates. Stops early after time_limit seconds; any clique
+    found is still a valid lower bound. Returns the members (node indexes).
+    """
+    deadline = time.perf_counter() + time_limit
+    order = sorted(range(len(adj)), key=lambda v: -len(adj[v]))
+    best = []
+    for v in order[:seeds]:
+        if len(adj[v]) + 1 <= len(best) or (best and time.perf_counter() > deadline):
+            break
+        clique, candidates = [v], set(adj[v])
+        while candidates:
+            u = max(candidates, key=lambda c: (len(adj[c] & candidates), -c))
+            clique.append(u)
+            candidates &= adj[u]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+def analyze_feasibility(start_date, end_date, subject_codes=None, skip_weekdays=(SUNDAY,)):
+    """
+    Checks whether the subjects (all, or subject_codes) can fit in the date
+    range with the current time slots and rooms.
+    Returns {"feasible", "slots_available", "days", "slots_per_day", "rooms",
+             "lower_bound": slots needed at least,
+             "problems": [{"kind", "needed", "available", "subjects": [code], "detail"}],
+             "seconds"}
+    """
+    start_time = time.perf_counter()
+    grid = date_grid(start_date, end_date, skip_weekdays)
+    days = sorted({d for d, _ in grid})
+    slots_per_day = _disjoint_slots({s for _, s in grid})
+    available = len(days) * slots_per_day
+    rooms = room_capacities()
+    sizes = section_sizes()
+
+    nodes = load_subject_nodes(subject_codes)
+    problems = []
+
+    def add(kind, needed, limit, members, detail):
+        problems.append({"kind": kind, "needed": needed, "available": limit,
+                         "subjects": sorted(nodes[v]["code"] for v in members), "detail": detail})
+
+    # Subjects sharing a section or an instructor are each a clique on their own
+    by_section, by_instructor = defaultdict(list), defaultdict(list)
+    for v, n in enumerate(nodes):
+        for sid in n["sections"]:
+            by_section[sid].append(v)
+        by_instructor[n["username"].lower()].append(v)
+    section_names = dict(db_query("SELECT section_id, section_name FROM sections"))
+    for sid, members in by_section.items():
+        if len(members) > available:
+            add("section", len(members), available, members,
+                f"Section {section_names.get(sid, sid)} has {len(members)} exams for {available} usable slots")
+    for name, members in by_instructor.items():
+        if len(members) > available:
+            add("instructor", len(members), available, members,
+                f"Instructor {nodes[members[0]]['instructor']} has {len(members)} exams for {available} usable slots")
+
+    adj = build_conflict_graph(nodes, shared_student_sections())
+    clique = greedy_clique(adj)
+    if len(clique) > available:
+        add("clique", len(clique), available, clique,
+            f"{len(clique)} subjects all conflict with each other (shared sections, instructors or students) "
+            f"but only {available} usable slots exist")
+
+    seats = len(rooms) * len(days) * slots_per_day
+    if len(nodes) > seats:
+        add("rooms", len(nodes), seats, range(len(nodes)),
+            f"{len(nodes)} exams but only {len(rooms)} rooms x {available} slots = {seats} room bookings")
+    largest = rooms[-1][0] if rooms else 0
+    too_big = [v for v, n in enumerate(nodes)
+               if any(sizes.get(str(sid), 0) > largest for sid in n["sections"])]
+    if rooms and too_big:
+        add("capacity", max(sizes.get(str(sid), 0) for v in too_big for sid in nodes[v]["sections"]),
+            largest, too_big, f"{len(too_big)} subjects have a section larger than the biggest room ({largest} seats)")
+
+    lower_bound = max([len(clique)] + [len(m) for m in by_section.values()] + [len(m) for m in by_instructor.values()]
+                      + [-(-len(nodes) // max(len(rooms), 1))])
+    return {
+        "feasible": not problems,
+        "slots_available": available,
+        "days": len(days),
+        "slots_per_day": slots_per_day,
+        "rooms": len(rooms),
+        "lower_bound": lower_bound,
+        "problems": problems,
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+def analyze_period(period_id, subject_codes=None, skip_weekdays=(SUNDAY,)):
+    """analyze_feasibility() for a saved exam period."""
+    rows = db_query("SELECT start_date, end_date FROM exam_periods WHERE period_id=?", (period_id,))
+    if not rows:
+        raise ValueError(f"No exam period with id {period_id}")
+    return analyze_feasibility(*rows[0], subject_codes=subject_codes, skip_weekdays=skip_weekdays)
@@ -5,15 +5,19 @@ import datetime
 from tkcalendar import DateEntry
 # Backend imports
 from scheduler import (
-    ensure_schema, db_query, db_execute,
+    ensure_schema, db_query, db_read, db_execute, close_connections,
     get_current_period_id, set_current_period_id,
-    current_period_display, add_exam as backend_add_exam,
+    current_period_display, delete_exam as backend_delete_exam,
     create_faculty_account, reset_faculty_password,
     delete_faculty_account, list_faculty_accounts,
     check_faculty_qr_generated, set_faculty_qr_generated, get_faculty_credentials  # Add these
 )
 # Conflict logic
-from conflict_checker import detect_all_conflicts, check_new_exam_conflicts
+from conflict_checker import detect_conflict_clusters, iter_cluster_pairs
+from suggest import suggest_slots
+from validation import validate_and_save_exam
+from scoring import score_period
+from feasibility import analyze_feasibility
 from qr_module import generate_schedule_qr_code
 from qr_module import generate_faculty_login_qr
 from qr_module import generate_schedule_qr_code, generate_faculty_login_qr, generate_admin_login_qr, check_admin_qr_generated
@@ -34,6 +38,9 @@ admin_current_exam_date = None  # For admin exam overview pagination
 current_role = None
 current_user = None
 
+# (date, slot, room) shown in the Faculty tab's suggestion list
+current_suggestions = []
+
 # Define week_num variable
 week_num = datetime.date.today().isocalendar()[1]  # Get the current week number
 
@@ -57,6 +64,18 @@ def add_new_period():
 
     semester = f"{sem_num} {acad_year}"
 
+    # Catch periods that are too short for the subjects before anyone schedules into them
+    report = analyze_feasibility(sd, ed)
+    if not report["feasible"]:
+        details = "\n".join(f"- {p['detail']} ({', '.join(p['subjects'][:8])}"
+                            f"{', ...' if len(p['subjects']) > 8 else ''})" for p in report["problems"][:6])
+        if not messagebox.askyesno(
+                "Period Too Small",
+                f"This period offers {report['slots_available']} usable slots "
+                f"({report['days']} days x {report['slots_per_day']} slots); "
+                f"the subjects need at least {report['lower_bound']}.\n\n{details}\n\nAdd it anyway?"):
+            return
+
     db_execute("""
         INSERT INTO exam_periods (semester, start_date, end_date, period_type)
         VALUES (?, ?, ?, ?)
@@ -243,13 +262,15 @@ def refresh_admin_overview(selected_date=None):
     if not pid:
         admin_overview.insert("", "end", values=("Set Current Period in Admin", "", "", "", "", "", "", ""))
         admin_current_exam_date_var.set("")
+        schedule_score_var.set("")
         return
+    refresh_schedule_score(pid)
     if selected_date is None:
         # Prefer previously selected date, otherwise pick the earliest exam date in the period
         if admin_current_exam_date:
             selected_date = admin_current_exam_date
         else:
-            first_date_row = db_query("SELECT MIN(exam_date) FROM exams WHERE period_id=?", (pid,))
+            first_date_row = db_read("SELECT MIN(exam_date) FROM exams WHERE period_id=?", (pid,))
             selected_date = first_date_row[0][0] if first_date_row and first_date_row[0][0] else None
     query = """
         SELECT exam_date, exam_slot, subject_code, subject_description, section_id, faculty_username, proctor, room
@@ -261,7 +282,7 @@ def refresh_admin_overview(selected_date=None):
         query += " AND exam_date = ?"
         params.append(selected_date)
     query += " ORDER BY CASE WHEN exam_slot LIKE '%PM' AND CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) < 12 THEN CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) + 12 WHEN exam_slot LIKE '%AM' AND CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) = 12 THEN 0 ELSE CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) END ASC, CAST(SUBSTR(exam_slot, INSTR(exam_slot, ':') + 1, 2) AS INTEGER) ASC, subject_code"
-    rows = db_query(query, params)
+    rows = db_read(query, params)
     if not rows:
         admin_overview.insert("", "end", values=(f"No exams for {selected_date or 'selected date'}", "", "", "", "", "", "", ""))
         admin_current_exam_date_var.set(f"Date: {selected_date or ''}")
@@ -277,10 +298,10 @@ def refresh_admin_overview(selected_date=None):
         admin_current_exam_date_var.set(f"Date: {edate}")
     # Insert only exam detail rows (no date row)
     for (_edate, slot, code, title, section_id, instructor, proctor, room) in rows:
-        sec_row = db_query("SELECT section_name FROM sections WHERE section_id=?", (section_id,))
+        sec_row = db_read("SELECT section_name FROM sections WHERE section_id=?", (section_id,))
         section_name = sec_row[0][0] if sec_row else ""
         # Fetch orig_time and section_name from subjects
-        subj_row = db_query("SELECT orig_time, section_name FROM subjects WHERE code=? AND title=?", (code, title))
+        subj_row = db_read("SELECT orig_time, section_name FROM subjects WHERE code=? AND title=?", (code, title))
         if subj_row:
             orig_time_full = subj_row[0][0] if subj_row[0][0] else ""
             sections_str = subj_row[0][1] if subj_row[0][1] else ""
@@ -298,13 +319,25 @@ def refresh_admin_overview(selected_date=None):
             orig = "-"
         admin_overview.insert("", "end", values=(slot, code, title, section_name, orig, instructor, proctor, room))
 
+def refresh_schedule_score(pid):
+    """Student-load summary for the period, shown under the overview table."""
+    score = score_period(pid, worst=1)
+    text = (f"Student load: {score['over_two_per_day']} over 2 a day, "
+            f"{score['back_to_back']} back-to-back, {score['short_gap']} short gaps "
+            f"({score['sections']} sections)")
+    if score["worst"]:
+        section_id, date, count, _b2b, _gaps = score["worst"][0]
+        sec_row = db_read("SELECT section_name FROM sections WHERE section_id=?", (section_id,))
+        text += f" | worst: {sec_row[0][0] if sec_row else section_id} on {date} ({count} exams)"
+    schedule_score_var.set(text)
+
 def next_admin_date():
     global admin_current_exam_date
     pid = get_current_period_id()
     if not pid:
         return
     # Find the next date with exams
-    dates = db_query("""
+    dates = db_read("""
         SELECT DISTINCT exam_date FROM exams
         WHERE period_id=? AND exam_date > ?
         ORDER BY exam_date LIMIT 1
@@ -319,7 +352,7 @@ def prev_admin_date():
     if not pid:
         return
     # Find the previous date with exams
-    dates = db_query("""
+    dates = db_read("""
         SELECT DISTINCT exam_date FROM exams
         WHERE period_id=? AND exam_date < ?
         ORDER BY exam_date DESC LIMIT 1
@@ -451,7 +484,7 @@ def remove_exam_gui():
             return
 
         exam_id = exam_row[0][0]
-        db_execute("DELETE FROM exams WHERE id=?", (exam_id,))
+        backend_delete_exam(exam_id)
 
         messagebox.showinfo("Removed", f"Exam removed: {code} - {title} on {exam_date} ({slot})")
         refresh_faculty_table(current_user, current_exam_date)
@@ -539,6 +572,40 @@ def edit_exam_gui():
 
     except Exception as e:
         messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}. Please try again.")
+
+
+def suggest_slots_gui():
+    global current_suggestions
+    suggestion_list.delete(0, tk.END)
+    current_suggestions = []
+    pid = get_current_period_id()
+    if not pid:
+        messagebox.showerror("Error", "Admin must set a Current Period before scheduling exams.")
+        return
+    section_text = section_var.get().strip()
+    if not subject_var.get().strip() or not section_text:
+        messagebox.showerror("Error", "Please select a subject and section first.")
+        return
+    sec_row = db_read("SELECT section_id FROM sections WHERE section_name=?", (section_text,))
+    if not sec_row:
+        messagebox.showerror("Error", "Invalid section selected.")
+        return
+    current_suggestions = suggest_slots(pid, str(sec_row[0][0]), current_user, proctor_var.get().strip(),
+                                        k=8, preferred_slot=orig_time_var.get())
+    if not current_suggestions:
+        suggestion_list.insert(tk.END, "No free slot found")
+    for date, slot, room in current_suggestions:
+        suggestion_list.insert(tk.END, f"{date}  {slot}  {room}")
+
+def on_suggestion_selected(event=None):
+    picked = suggestion_list.curselection()
+    if not picked or picked[0] >= len(current_suggestions):
+        return
+    date, slot, room = current_suggestions[picked[0]]
+    date_var.set_date(datetime.date.fromisoformat(date))
+    slot_var.set(slot)
+    room_var.set(room)
+
 def reset_form():
     global edit_mode, edit_exam_id
     edit_mode = False
@@ -554,6 +621,7 @@ def reset_form():
     slot_var.set("")
     proctor_var.set("")
     room_var.set("")
+    suggestion_list.delete(0, tk.END)
 
 def add_exam_gui():
     global edit_mode, edit_exam_id
@@ -568,139 +636,68 @@ def add_exam_gui():
             return
 
         subject_text = subject_var.get().strip()
+        code, title = subject_text.split(" - ", 1) if " - " in subject_text else ("", "")
         exam_date = date_var.get_date().strftime("%Y-%m-%d")
-        exam_slot = slot_var.get().strip()
-        proctor = proctor_var.get().strip()
-        room_label = room_var.get().strip()
-        section_text = section_var.get().strip()  # Now just the name, e.g., "T231"
-
-        # Validation
-        if not subject_text or " - " not in subject_text:
-            messagebox.showerror("Error", "Please select a subject from the dropdown.")
-            return
-        if not exam_slot:
-            messagebox.showerror("Error", "Please select an exam time slot.")
-            return
-        if not room_label:
-            messagebox.showerror("Error", "Please select a room.")
-            return
-        if not proctor:
-            messagebox.showerror("Error", "Please enter a proctor name.")
-            return
-        if not section_text:
-            messagebox.showerror("Error", "Please select a section.")
+        if edit_mode and not edit_exam_id:
+            messagebox.showerror("Error", "No exam selected for update.")
             return
 
-        code, title = subject_text.split(" - ", 1)
-
-        # Query section_id from section_name
-        sec_row = db_query("SELECT section_id FROM sections WHERE section_name=?", (section_text,))
-        if not sec_row:
-            messagebox.showerror("Error", "Invalid section selected.")
+        # Every check and the write happen in one transaction in the backend
+        result = validate_and_save_exam(pid, current_user, code, title, section_var.get(), exam_date,
+                                        slot_var.get(), proctor_var.get(), room_var.get(),
+                                        exam_id=edit_exam_id if edit_mode else None)
+        violations = result["violations"]
+        verb = "added" if result["action"] == "add" else "updated"
+        if any(v["kind"] == "conflict" for v in violations):
+            messagebox.showerror("Conflict Detected", f"This exam cannot be {verb} due to the following conflicts:\n"
+                                 + "\n".join(v["message"] for v in violations)
+                                 + "\nPlease adjust the date, slot, room, proctor, or section.")
             return
-        section_id = str(sec_row[0][0])
-
-        # Confirm subject exists
-        if not db_query("SELECT 1 FROM subjects WHERE code=? AND title=?", (code, title)):
-            messagebox.showerror("Error", "Subject not found. Please pick from the dropdown.")
-            return
-
-        # Define exclude_id for duplicate checks
-        exclude_id = f" AND id != {edit_exam_id}" if edit_mode else ""
-
-        # Check for conflicts only if not in edit mode
-        if not edit_mode:
-            # Pre-check: Ensure the new exam doesn't conflict with existing exams
-            new_exam = (exam_date, exam_slot, code, title, current_user, proctor, room_label, pid, section_id)
-            conflicts = check_new_exam_conflicts(pid, new_exam)
-            if conflicts:
-                conflict_details = []
-                for conflict_type, existing_exam in conflicts:
-                    if conflict_type == "room":
-                        conflict_details.append(f"Room '{existing_exam[6]}' is already booked on {existing_exam[0]} at {existing_exam[1]}.")
-                    elif conflict_type == "proctor":
-                        conflict_details.append(f"Proctor '{existing_exam[5]}' is already assigned on {existing_exam[0]} at {existing_exam[1]}.")
-                    elif conflict_type == "instructor":
-                        conflict_details.append(f"Instructor '{existing_exam[4]}' has another exam on {existing_exam[0]} at {existing_exam[1]}.")
-                    elif conflict_type == "section":
-                        conflict_details.append(f"Section {existing_exam[7]} already has an exam on {existing_exam[0]} at {existing_exam[1]} with proctor '{existing_exam[5]}' in room '{existing_exam[6]}'.")
-                messagebox.showerror("Conflict Detected", "This exam cannot be added due to the following conflicts:\n" + "\n".join(conflict_details) + "\nPlease adjust the date, slot, room, proctor, or section.")
-                return
-        else:
-            # If in edit mode, exclude the current exam from conflict checks
-            duplicate_check = db_query(f"""
-                 SELECT 1 FROM exams
-                 WHERE period_id=? AND subject_code=? AND subject_description=? AND exam_slot=? AND proctor=? AND room=? AND section_id=?{exclude_id}
-            """, (pid, code, title, exam_slot, proctor, room_label, section_id))
-            if duplicate_check:
-                messagebox.showerror("Duplicate Exam", "An identical exam (same subject, section, slot, proctor, and room) already exists in this period. Please adjust the details or check for duplicates.")
-                return
-
-        # Check for any exam with the same subject in the current period (ignore other details)
-        duplicate_check = db_query(f"""
-            SELECT 1 FROM exams
-            WHERE period_id=? AND subject_code=? AND subject_description=?{exclude_id}
-        """, (pid, code, title))
-        if duplicate_check:
-            messagebox.showerror("Duplicate Exam", "An exam for this subject already exists in the current period. You cannot create another exam for the same subject.")
+        if violations:
+            title_text = "Duplicate Exam" if violations[0]["kind"] == "duplicate" else "Error"
+            messagebox.showerror(title_text, "\n".join(v["message"] for v in violations))
             return
 
-        # Calculate week number for the new exam date (based on ISO calendar)
-        exam_week = datetime.date.fromisoformat(exam_date).isocalendar()[1]
-
-        # Check for exams with the same subject and section in the same week (now uses exclude_id)
-        duplicate_check = db_query(f"""
-            SELECT 1 FROM exams
-            WHERE period_id=? AND subject_code=? AND subject_description=? AND section_id=? AND exam_slot=? AND proctor=? AND room=? AND strftime('%W', exam_date) = ?{exclude_id}
-""", (pid, code, title, section_id, exam_slot, proctor, room_label, exam_week))
-        if duplicate_check:
-            messagebox.showerror("Duplicate Exam", "An identical exam (same subject, section, slot, proctor, and room) already exists in the same week. Please choose a different week or adjust the details.")
-            return
-
-        if edit_mode:
-            # Update existing exam
-            if not edit_exam_id:
-                messagebox.showerror("Error", "No exam selected for update.")
-                return
-            db_execute("""
-                UPDATE exams SET exam_date=?, exam_slot=?, proctor=?, room=?
-                WHERE id=?
-            """, (exam_date, exam_slot, proctor, room_label, edit_exam_id))
-            messagebox.showinfo("Updated", f"Exam updated: {code} - {title} on {exam_date} ({exam_slot})")
+        if result["action"] == "update":
+            messagebox.showinfo("Updated", f"Exam updated: {code} - {title} on {exam_date} ({slot_var.get().strip()})")
             reset_form()
         else:
-            # Insert exam via backend
-            backend_add_exam(current_user, code, title, exam_date, exam_slot, proctor, room_label, pid, section_id)
-
-            messagebox.showinfo("Added", f"Exam added: {code} - {title} on {exam_date} ({exam_slot})")
+            messagebox.showinfo("Added", f"Exam added: {code} - {title} on {exam_date} ({slot_var.get().strip()})")
 
         refresh_faculty_table(current_user)
         refresh_admin_overview()
 
-        # After adding exam, check for conflicts (warn about any in the updated schedule)
-        conflicts = detect_all_conflicts(period_id=pid)
-        conflict_messages = []
-        if conflicts["room_conflicts"]:
-            for a, b in conflicts["room_conflicts"]:
-                conflict_messages.append(f"Room conflict: Exams '{a[2]}' and '{b[2]}' are both scheduled in room '{a[6]}' on {a[0]} at {a[1]}.")
-        if conflicts["proctor_conflicts"]:
-            for a, b in conflicts["proctor_conflicts"]:
-                conflict_messages.append(f"Proctor conflict: Exams '{a[2]}' and '{b[2]}' both have proctor '{a[5]}' on {a[0]} at {a[1]}.")
-        if conflicts["instructor_conflicts"]:
-            for a, b in conflicts["instructor_conflicts"]:
-                # Skip if same instructor but different sections (allowed)
-                if a[7] != b[7]:
-                    continue
-                conflict_messages.append(f"Instructor conflict: Instructor '{a[4]}' is assigned to exams '{a[2]}' and '{b[2]}' on {a[0]} at {a[1]}.")
-        if conflicts["section_conflicts"]:
-            for a, b in conflicts["section_conflicts"]:
-                conflict_messages.append(f"Section conflict: Section {a[7]} has exams '{a[2]}' and '{b[2]}' scheduled on {a[0]} at {a[1]}.")
+        # After saving the exam, check for conflicts (warn about any in the updated schedule)
+        conflict_messages = [msg for msg in map(cluster_message, detect_conflict_clusters(period_id=pid)) if msg]
 
         if conflict_messages:
             messagebox.showwarning("Schedule Conflicts Detected", "The following conflicts exist in the exam schedule:\n\n" + "\n".join(conflict_messages) + "\n\nPlease review and resolve them.")
     except Exception as e:
         messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}. Please check your inputs and try again.")
 
+def cluster_message(cluster):
+    """One warning line per conflict cluster, listing every exam involved."""
+    exams = cluster["exams"]
+    when = f"on {cluster['date']} at {', '.join(cluster['slots'])}"
+    if cluster["type"] == "instructor":
+        # Same instructor with different sections is allowed; only flag overlapping
+        # pairs that share a section
+        flagged = set()
+        for a, b in iter_cluster_pairs(cluster):
+            if a[7] == b[7]:
+                flagged.update((a[8], b[8]))
+        exams = [e for e in exams if e[8] in flagged]
+        if not exams:
+            return None
+    codes = ", ".join(f"'{e[2]}'" for e in exams)
+    if cluster["type"] == "room":
+        return f"Room conflict: {len(exams)} exams ({codes}) are all scheduled in room '{cluster['key']}' {when}."
+    if cluster["type"] == "proctor":
+        return f"Proctor conflict: {len(exams)} exams ({codes}) all have proctor '{cluster['key']}' {when}."
+    if cluster["type"] == "instructor":
+        return f"Instructor conflict: Instructor '{cluster['key']}' is assigned to {len(exams)} exams ({codes}) {when}."
+    return f"Section conflict: Section {cluster['key']} has {len(exams)} exams ({codes}) scheduled {when}."
+
 def refresh_faculty_table(username, selected_date=None):
     global current_exam_date
     for row in faculty_table.get_children():
@@ -715,7 +712,7 @@ def refresh_faculty_table(username, selected_date=None):
         if current_exam_date:
             selected_date = current_exam_date
         else:
-            first_date_row = db_query("SELECT MIN(exam_date) FROM exams WHERE faculty_username=? AND period_id=?", (username, pid))
+            first_date_row = db_read("SELECT MIN(exam_date) FROM exams WHERE faculty_username=? AND period_id=?", (username, pid))
             selected_date = first_date_row[0][0] if first_date_row and first_date_row[0][0] else None
     query = """
         SELECT exam_date, exam_slot, subject_code, subject_description, section_id, faculty_username, proctor, room
@@ -727,7 +724,7 @@ def refresh_faculty_table(username, selected_date=None):
         query += " AND exam_date = ?"
         params.append(selected_date)
     query += " ORDER BY CASE WHEN exam_slot LIKE '%PM' AND CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) < 12 THEN CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) + 12 WHEN exam_slot LIKE '%AM' AND CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) = 12 THEN 0 ELSE CAST(SUBSTR(exam_slot, 1, INSTR(exam_slot, ':') - 1) AS INTEGER) END ASC, CAST(SUBSTR(exam_slot, INSTR(exam_slot, ':') + 1, 2) AS INTEGER) ASC, subject_code"
-    rows = db_query(query, params)
+    rows = db_read(query, params)
     if not rows:
         current_exam_date_var.set("")
         return
@@ -743,13 +740,13 @@ def refresh_faculty_table(username, selected_date=None):
     # Insert only exam detail rows (no date row)
     for (_edate, slot, code, title, section_id, instructor_username, proctor, room) in rows:
         # Get full name for instructor
-        acct = db_query("SELECT name FROM accounts WHERE username=?", (instructor_username,))
+        acct = db_read("SELECT name FROM accounts WHERE username=?", (instructor_username,))
         instructor_full_name = acct[0][0] if acct else instructor_username  # Fallback to username if not found
         
-        sec_row = db_query("SELECT section_name FROM sections WHERE section_id=?", (section_id,))
+        sec_row = db_read("SELECT section_name FROM sections WHERE section_id=?", (section_id,))
         section_name = sec_row[0][0] if sec_row else ""
         # Fetch orig_time and section_name from subjects
-        subj_row = db_query("SELECT orig_time, section_name FROM subjects WHERE code=? AND title=?", (code, title))
+        subj_row = db_read("SELECT orig_time, section_name FROM subjects WHERE code=? AND title=?", (code, title))
         if subj_row:
             orig_time_full = subj_row[0][0] if subj_row[0][0] else ""
             sections_str = subj_row[0][1] if subj_row[0][1] else ""
@@ -773,7 +770,7 @@ def next_exam_date():
     if not pid:
         return
     # Find the next date with exams
-    dates = db_query("""
+    dates = db_read("""
         SELECT DISTINCT exam_date FROM exams
         WHERE faculty_username=? AND period_id=? AND exam_date > ?
         ORDER BY exam_date LIMIT 1
@@ -788,7 +785,7 @@ def prev_exam_date():
     if not pid:
         return
     # Find the previous date with exams
-    dates = db_query("""
+    dates = db_read("""
         SELECT DISTINCT exam_date FROM exams
         WHERE faculty_username=? AND period_id=? AND exam_date < ?
         ORDER BY exam_date DESC LIMIT 1
@@ -893,6 +890,11 @@ def logout():
     except: pass
     login_frame.tkraise()
 
+def on_close():
+    """Closes the database connections, then the window."""
+    close_connections()
+    root.destroy()
+
 def scan_qr_login():
     """Scans QR code for login."""
     import cv2
@@ -925,6 +927,7 @@ def scan_qr_login():
 # ------------------ GUI layout ------------------
 root = tk.Tk()
 root.title("Exam Scheduler")
+root.protocol("WM_DELETE_WINDOW", on_close)
 root.resizable(True, True)  # Allow resizing
 
 # Configure ttk Style for better table visibility
@@ -1315,11 +1318,13 @@ for col, w in [
 overview_button_bar = ttk.Frame(overview_content)
 overview_button_bar.grid(row=3, column=0, columnspan=2, sticky="ew", pady=8)
 ttk.Button(overview_button_bar, text="📋 Generate QR", command=generate_schedule_qr_code, width=15).pack(side="left", padx=2)
+schedule_score_var = tk.StringVar()
+ttk.Label(overview_button_bar, textvariable=schedule_score_var, foreground="#555555").pack(side="left", padx=8)
 ttk.Button(overview_button_bar, text="🚪 Logout", command=logout, width=15).pack(side="right", padx=2)
 
 # ----- Faculty Tab -----
 faculty_info_frame = ttk.Frame(faculty_tab)
-faculty_info_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0,6))
+faculty_info_frame.grid(row=0, column=0, columnspan=3, sticky="ew", pady=(0,6))
 fac_user_lbl = ttk.Label(faculty_info_frame, text="Logged in as: ")
 fac_role_lbl = ttk.Label(faculty_info_frame, text="Role: Faculty")
 fac_dept_lbl = ttk.Label(faculty_info_frame, text="Department: ")
@@ -1327,7 +1332,7 @@ fac_user_lbl.grid(row=0, column=0, sticky="w")
 fac_role_lbl.grid(row=0, column=1, sticky="w", padx=12)
 fac_dept_lbl.grid(row=0, column=2, sticky="w", padx=12)
 
-ttk.Separator(faculty_tab).grid(row=1, column=0, columnspan=2, sticky="ew", pady=8)
+ttk.Separator(faculty_tab).grid(row=1, column=0, columnspan=3, sticky="ew", pady=8)
 
 ttk.Label(faculty_tab, text="Current Period").grid(row=2, column=0, sticky="w")
 current_period_label_var = tk.StringVar(value=current_period_display())
@@ -1379,6 +1384,14 @@ room_values = [r[0] for r in room_rows] if room_rows else []
 room_box = ttk.Combobox(faculty_tab, textvariable=room_var, values=room_values, width=24, state="readonly")
 room_box.grid(row=9, column=1, sticky="w")
 
+# Suggested (date, slot, room), in a column of its own right of the pickers
+suggestion_frame = ttk.LabelFrame(faculty_tab, text="Suggestions", padding=4)
+suggestion_frame.grid(row=6, column=2, rowspan=4, sticky="nw", padx=(12, 0))
+ttk.Button(suggestion_frame, text="Suggest", command=suggest_slots_gui).pack(fill="x")
+suggestion_list = tk.Listbox(suggestion_frame, height=5, width=38)
+suggestion_list.pack(fill="both", pady=(4, 0))
+suggestion_list.bind("<<ListboxSelect>>", on_suggestion_selected)
+
 # Add Exam button
 add_exam_button = ttk.Button(faculty_tab, text="Add Exam", command=add_exam_gui)
 add_exam_button.grid(row=10, column=1, sticky="e", pady=6, padx=(6, 0))
@@ -1392,11 +1405,11 @@ ttk.Button(faculty_tab, text="Remove Exam", command=remove_exam_gui).grid(row=11
 ttk.Button(faculty_tab, text="Edit Exam", command=edit_exam_gui).grid(row=11, column=1, sticky="w", pady=6)
 
 # Shift the separator and table down
-ttk.Separator(faculty_tab).grid(row=12, column=0, columnspan=2, sticky="ew", pady=8)
+ttk.Separator(faculty_tab).grid(row=12, column=0, columnspan=3, sticky="ew", pady=8)
 
 # After the "My Exams" label
 pagination_frame = ttk.Frame(faculty_tab)
-pagination_frame.grid(row=13, column=1, sticky="e", pady=4)
+pagination_frame.grid(row=13, column=1, columnspan=2, sticky="e", pady=4)
 ttk.Button(pagination_frame, text="◀ Previous", command=prev_exam_date, width=12).pack(side="left", padx=2)
 ttk.Button(pagination_frame, text="Next ▶", command=next_exam_date, width=12).pack(side="left", padx=2)
 
@@ -1405,11 +1418,11 @@ ttk.Label(faculty_tab, text="My Exams (current period)", font=("Segoe UI", 11, "
 # Date display label with better styling
 current_exam_date_var = tk.StringVar()
 faculty_date_display = ttk.Label(faculty_tab, textvariable=current_exam_date_var, font=("Segoe UI", 11, "bold"), foreground="#0078d4")
-faculty_date_display.grid(row=14, column=0, columnspan=2, sticky="ew", pady=(8, 6), padx=8)
+faculty_date_display.grid(row=14, column=0, columnspan=3, sticky="ew", pady=(8, 6), padx=8)
 
 # Create faculty_table here with scrollbars
 faculty_table_frame = ttk.LabelFrame(faculty_tab, text="Your Schedule", padding=0, relief="solid", borderwidth=2)
-faculty_table_frame.grid(row=15, column=0, columnspan=2, sticky="nsew", pady=8)
+faculty_table_frame.grid(row=15, column=0, columnspan=3, sticky="nsew", pady=8)
 faculty_tab.grid_rowconfigure(15, weight=1)
 faculty_tab.grid_columnconfigure(0, weight=1)
 faculty_tab.grid_columnconfigure(1, weight=1)
@@ -1438,13 +1451,16 @@ for col, w in [
     faculty_table.column(col, width=w, minwidth=60)
 
 fac_button_bar = ttk.Frame(faculty_tab)
-fac_button_bar.grid(row=16, column=0, columnspan=2, sticky="ew", pady=8)
+fac_button_bar.grid(row=16, column=0, columnspan=3, sticky="ew", pady=8)
 ttk.Button(fac_button_bar, text="Logout", command=logout).pack(side="right")
 
 # ------------------ Start app ------------------
 if __name__ == "__main__":
     ensure_schema()
     login_frame.tkraise()
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        close_connections()
 
 
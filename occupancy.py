@@ -0,0 +1,133 @@
+"""
+Occupancy Index
+---------------
+In-memory map of what is in use on every exam_date of a period: rooms,
+proctors, instructors and sections, each kept as an interval index over the
+slot times so overlapping (not just identical) slots are found.
+- Kept current by the exam write hooks in scheduler
+- Rebuilt lazily when a different period is asked for, or when the database
+  file changed behind our back (another process or a raw SQL write)
+"""
+
+from collections import defaultdict
+
+import scheduler
+from scheduler import DATE, SLOT, CODE, INSTRUCTOR, PROCTOR, ROOM, SECTION, EXAM_ID, PERIOD
+from timeslots import IntervalList, slot_lane
+
+# Order in which conflict types are reported for a single existing exam
+CONFLICT_TYPES = ("room", "proctor", "instructor", "section")
+
+
+def _resource_keys(row):
+    return (
+        ("room", row[ROOM].lower()),
+        ("proctor", row[PROCTOR].lower()),
+        ("instructor", row[INSTRUCTOR].lower()),
+        ("section", str(row[SECTION])),
+    )
+
+
+class OccupancyIndex:
+    def __init__(self):
+        self.period_id = None
+        self.signature = None
+        self.rebuilds = 0
+        self.lanes = {}  # (kind, key, date, lane) -> IntervalList; kind "all" holds every exam
+        self.rows = {}   # exam_id -> row
+
+    # ---- maintenance ----
+    def invalidate(self):
+        self.period_id = None
+        self.signature = None
+
+    def ensure(self, period_id):
+        if (period_id != self.period_id or self.signature is None
+                or self.signature != scheduler.db_signature()):
+            self.rebuild(period_id)
+
+    def rebuild(self, period_id):
+        # Stamp before reading, so a write racing the load forces another rebuild
+        self.signature = scheduler.db_signature()
+        self.period_id = period_id
+        self.lanes = {}
+        self.rows = {}
+        for row in scheduler.list_exams(period_id):
+            self._insert(row)
+        self.rebuilds += 1
+
+    def _entries(self, row):
+        lane, start, end = slot_lane(row[SLOT])
+        for kind, key in (("all", ""),) + _resource_keys(row):
+            yield (kind, key, row[DATE], lane), (start, end, row[EXAM_ID])
+
+    def add_row(self, row):
+        """Indexes a row in list_exams() shape; used directly for indexes not backed by the DB."""
+        self._insert(row)
+
+    def _insert(self, row):
+        for lane_key, interval in self._entries(row):
+            lst = self.lanes.get(lane_key)
+            if lst is None:
+                lst = self.lanes[lane_key] = IntervalList()
+            lst.add(*interval)
+        self.rows[row[EXAM_ID]] = row
+
+    def _remove(self, exam_id):
+        row = self.rows.pop(exam_id, None)
+        if row is None:
+            return
+        for lane_key, interval in self._entries(row):
+            lst = self.lanes[lane_key]
+            lst.remove(*interval)
+            if not lst:
+                del self.lanes[lane_key]
+
+    def on_exam_change(self, action, exam_id, row, before):
+        if self.period_id is None:
+            return
+        if action == "reset" or before != self.signature:
+            # Someone else wrote in between; our deltas are no longer enough
+            self.invalidate()
+            return
+        self._remove(exam_id)
+        if row is not None and row[PERIOD] == self.period_id:
+            self._insert(row[:PERIOD])
+        self.signature = scheduler.db_signature()
+
+    # ---- queries ----
+    def overlapping(self, kind, key, date, slot):
+        """Ids of exams using resource (kind, key) on `date` at a time overlapping `slot`."""
+        lane, start, end = slot_lane(slot)
+        lst = self.lanes.get((kind, key, date, lane))
+        return lst.overlapping(start, end) if lst is not None else ()
+
+    def conflicts_for(self, period_id, new_exam, exclude_id=None):
+        """
+        Same result as scanning the period: a list of (type, existing_exam),
+        ordered like list_exams() and, per exam, room/proctor/instructor/section.
+        """
+        self.ensure(period_id)
+        return self.conflicts_with(new_exam, exclude_id)
+
+    def conflicts_with(self, new_exam, exclude_id=None):
+        """conflicts_for() against whatever is currently indexed, without a freshness check."""
+        date, slot = new_exam[0], new_exam[1]
+        instructor = new_exam[4].lower()
+        hits = defaultdict(set)
+        for kind, key in (("room", new_exam[6].lower()),
+                          ("proctor", new_exam[5].lower()),
+                          ("section", str(new_exam[-1]))):
+            for exam_id in self.overlapping(kind, key, date, slot):
+                hits[exam_id].add(kind)
+        # Instructor conflicts are flagged against *other* instructors in the slot
+        for exam_id in self.overlapping("all", "", date, slot):
+            if self.rows[exam_id][INSTRUCTOR].lower() != instructor:
+                hits[exam_id].add("instructor")
+
+        hits.pop(exclude_id, None)
+        ordered = sorted(hits, key=lambda i: (self.rows[i][DATE], self.rows[i][SLOT], self.rows[i][CODE], i))
+        return [(kind, self.rows[i]) for i in ordered for kind in CONFLICT_TYPES if kind in hits[i]]
+
+index = OccupancyIndex()
+scheduler.exam_change_hooks.append(index.on_exam_change)
@@ -0,0 +1,459 @@
+"""
+Schedule Optimizer
+------------------
+Improves a feasible timetable by simulated annealing on its soft costs:
+- Section sitting exams in back-to-back slots
+- Section with more than two exams on one day
+- Empty seats (room far larger than the section)
+- Instructor with several exams on one day
+Moves relocate an exam to another (date, slot, room) or swap two exams.
+Hard constraints (room, proctor, section, instructor, shared students,
+room capacity) are never broken: infeasible moves are rejected. Each move
+is priced in O(1) from per-section and per-instructor count tables, so the
+period is never reloaded while searching.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import scheduler
+from scheduler import list_exams, DATE, SLOT, INSTRUCTOR, PROCTOR, ROOM, SECTION, EXAM_ID
+from autoschedule import SUNDAY, period_grid, shared_student_sections
+from room_allocator import section_sizes, room_capacities, UNKNOWN_CAPACITY
+from timeslots import slots_overlap
+
+WEIGHTS = {
+    "back_to_back": 10.0,        # per pair of adjacent slots a section sits on one day
+    "over_two_per_day": 30.0,    # per exam beyond the second for a section on one day
+    "empty_seats": 0.01,         # per empty seat
+    "instructor_same_day": 2.0,  # per exam beyond the first for an instructor on one day
+}
+
+
+# -------------------------------
+# Snapshot
+# -------------------------------
+
+def load_snapshot(period_id, skip_weekdays=(SUNDAY,)):
+    """
+    Compact, picklable view of a period: plain lists of ints, one entry per
+    movable exam. Exams whose (date, slot) is not on the period grid stay
+    where they are and only block the grid cells they overlap.
+    """
+    grid = period_grid(period_id, skip_weekdays)
+    dates = sorted({d for d, _ in grid})
+    slots = [s for d, s in grid if d == dates[0]] if dates else []
+    date_index = {d: i for i, d in enumerate(dates)}
+    slot_index = {s: i for i, s in enumerate(slots)}
+    overlaps = [[j for j, b in enumerate(slots) if slots_overlap(a, b)] for a in slots]
+
+    sizes = section_sizes()
+    rooms = room_capacities()
+    room_index = {label.lower(): i for i, (_cap, label) in enumerate(rooms)}
+    capacity = [cap for cap, _label in rooms]
+    room_labels = [label for _cap, label in rooms]
+    ids = {"section": {}, "instructor": {}, "proctor": {}}
+
+    def index_of(kind, key):
+        if key is None or key == "":
+            return -1
+        return ids[kind].setdefault(str(key).lower(), len(ids[kind]))
+
+    def room_of(label):
+        key = (label or "").lower()
+        if key not in room_index:
+            room_index[key] = len(room_labels)
+            room_labels.append(label)
+            capacity.append(UNKNOWN_CAPACITY)
+        return room_index[key]
+
+    snap = {
+        "period_id": period_id, "dates": dates, "slots": slots, "overlaps": overlaps,
+        "room_labels": room_labels, "capacity": capacity,
+        "exam_ids": [], "section": [], "instructor": [], "proctor": [], "size": [],
+        "cell": [], "room": [], "fixed": [],
+    }
+    n_slots = len(slots)
+    for exam in list_exams(period_id):
+        section = index_of("section", exam[SECTION])
+        instructor = index_of("instructor", exam[INSTRUCTOR])
+        proctor = index_of("proctor", exam[PROCTOR])
+        room = room_of(exam[ROOM])
+        d, k = date_index.get(exam[DATE]), slot_index.get(exam[SLOT])
+        if d is None or k is None:
+            if d is not None:
+                cells = [d * n_slots + j for j, s in enumerate(slots) if slots_overlap(s, exam[SLOT])]
+                snap["fixed"].append((cells, section, instructor, proctor, room))
+            continue
+        snap["exam_ids"].append(exam[EXAM_ID])
+        snap["section"].append(section)
+        snap["instructor"].append(instructor)
+        snap["proctor"].append(proctor)
+        snap["size"].append(sizes.get(str(exam[SECTION]), 0))
+        snap["cell"].append(d * n_slots + k)
+        snap["room"].append(room)
+
+    section_ids = ids["section"]
+    partners = [[] for _ in section_ids]
+    for a, b in shared_student_sections():
+        ia, ib = section_ids.get(str(a)), section_ids.get(str(b))
+        if ia is not None and ib is not None:
+            partners[ia].append(ib)
+    snap["partners"] = partners
+    snap["counts"] = {kind: len(v) for kind, v in ids.items()}
+    return snap
+
+
+# -------------------------------
+# Incremental state
+# -------------------------------
+
+class _State:
+    """
+    Occupancy and count tables for one snapshot. remove() and add() update
+    them and return the change in cost, so a move is priced by applying it.
+    """
+
+    def __init__(self, snap, weights):
+        self.snap = snap
+        self.n_slots = len(snap["slots"])
+        self.n_cells = self.n_slots * len(snap["dates"])
+        self.overlaps = snap["overlaps"]
+        self.capacity = snap["capacity"]
+        self.partners = snap["partners"]
+        self.section = snap["section"]
+        self.instructor = snap["instructor"]
+        self.proctor = snap["proctor"]
+        self.size = snap["size"]
+        self.cell = list(snap["cell"])
+        self.room = list(snap["room"])
+        self.w_b2b = weights["back_to_back"]
+        self.w_day = weights["over_two_per_day"]
+        self.w_seats = weights["empty_seats"]
+        self.w_inst = weights["instructor_same_day"]
+
+        counts, cells, days = snap["counts"], self.n_cells, len(snap["dates"])
+        self.sec_occ = [0] * (max(counts["section"], 1) * cells)
+        self.inst_occ = [0] * (max(counts["instructor"], 1) * cells)
+        self.proc_occ = [0] * (max(counts["proctor"], 1) * cells)
+        self.room_occ = [0] * (len(self.capacity) * cells)
+        self.sec_day = [0] * (max(counts["section"], 1) * days)
+        self.inst_day = [0] * (max(counts["instructor"], 1) * days)
+
+        # Off-grid exams: hard blockers only
+        self.blocked = set()
+        for fixed_cells, section, instructor, proctor, room in snap["fixed"]:
+            for c in fixed_cells:
+                self.blocked.update((("room", room, c), ("section", section, c),
+                                     ("instructor", instructor, c), ("proctor", proctor, c)))
+
+        self.cost = 0.0
+        for i in range(len(self.cell)):
+            self.cost += self.add(i, self.cell[i], self.room[i])
+
+    def fits(self, i, cell, room):
+        """Hard constraints for putting exam i at (cell, room), with i itself not placed."""
+        size = self.size[i]
+        if self.capacity[room] < size:
+            return False
+        base = cell - cell % self.n_slots
+        n = self.n_cells
+        section, instructor, proctor = self.section[i], self.instructor[i], self.proctor[i]
+        blocked = self.blocked
+        for k in self.overlaps[cell % self.n_slots]:
+            c = base + k
+            if self.room_occ[room * n + c] or ("room", room, c) in blocked:
+                return False
+            if section >= 0:
+                if self.sec_occ[section * n + c] or ("section", section, c) in blocked:
+                    return False
+                for p in self.partners[section]:
+                    if self.sec_occ[p * n + c] or ("section", p, c) in blocked:
+                        return False
+            if instructor >= 0 and (self.inst_occ[instructor * n + c] or ("instructor", instructor, c) in blocked):
+                return False
+            if proctor >= 0 and (self.proc_occ[proctor * n + c] or ("proctor", proctor, c) in blocked):
+                return False
+        return True
+
+    def _seat_cost(self, i, room):
+        cap = self.capacity[room]
+        if cap == UNKNOWN_CAPACITY:
+            return 0.0
+        return self.w_seats * max(0, cap - self.size[i])
+
+    def _neighbours(self, section, cell):
+        """Occupied slots right before and after cell on the same day."""
+        k = cell % self.n_slots
+        row = section * self.n_cells
+        found = 0
+        if k > 0 and self.sec_occ[row + cell - 1]:
+            found += 1
+        if k + 1 < self.n_slots and self.sec_occ[row + cell + 1]:
+            found += 1
+        return found
+
+    def add(self, i, cell, room):
+        self.cell[i], self.room[i] = cell, room
+        day = cell // self.n_slots
+        days = self.n_cells // self.n_slots
+        delta = self._seat_cost(i, room)
+        self.room_occ[room * self.n_cells + cell] += 1
+        proctor, instructor, section = self.proctor[i], self.instructor[i], self.section[i]
+        if proctor >= 0:
+            self.proc_occ[proctor * self.n_cells + cell] += 1
+        if instructor >= 0:
+            self.inst_occ[instructor * self.n_cells + cell] += 1
+            n = self.inst_day[instructor * days + day]
+            if n >= 1:
+                delta += self.w_inst
+            self.inst_day[instructor * days + day] = n + 1
+        if section >= 0:
+            at = section * self.n_cells + cell
+            if not self.sec_occ[at]:
+                delta += self.w_b2b * self._neighbours(section, cell)
+            self.sec_occ[at] += 1
+            n = self.sec_day[section * days + day]
+            if n >= 2:
+                delta += self.w_day
+            self.sec_day[section * days + day] = n + 1
+        return delta
+
+    def remove(self, i):
+        cell, room = self.cell[i], self.room[i]
+        day = cell // self.n_slots
+        days = self.n_cells // self.n_slots
+        delta = -self._seat_cost(i, room)
+        self.room_occ[room * self.n_cells + cell] -= 1
+        proctor, instructor, section = self.proctor[i], self.instructor[i], self.section[i]
+        if proctor >= 0:
+            self.proc_occ[proctor * self.n_cells + cell] -= 1
+        if instructor >= 0:
+            self.inst_occ[instructor * self.n_cells + cell] -= 1
+            n = self.inst_day[instructor * days + day] - 1
+            if n >= 1:
+                delta -= self.w_inst
+            self.inst_day[instructor * days + day] = n
+        if section >= 0:
+            at = section * self.n_cells + cell
+            self.sec_occ[at] -= 1
+            if not self.sec_occ[at]:
+                delta -= self.w_b2b * self._neighbours(section, cell)
+            n = self.sec_day[section * days + day] - 1
+            if n >= 2:
+                delta -= self.w_day
+            self.sec_day[section * days + day] = n
+        return delta
+
+
+def schedule_cost(snap, cells=None, rooms=None, weights=None):
+    """Total soft cost of a placement, computed from scratch (for checking)."""
+    snap = dict(snap, cell=cells or snap["cell"], room=rooms or snap["room"])
+    return _State(snap, weights or WEIGHTS).cost
+
+
+# -------------------------------
+# Annealing
+# -------------------------------
+
+def anneal(snap, iterations=200_000, time_limit=None, seed=0, weights=None,
+           t_start=20.0, t_end=0.05, swap_share=0.3, target_cost=None, samples=100, stop=None):
+    """
+    Simulated annealing from the snapshot's placement. Stops at the
+    iteration budget, the time budget (seconds), once target_cost is
+    reached or once the stop event is set, whichever comes first; the
+    temperature follows whichever budget is closer to running out.
+    Returns {"cells", "rooms", "cost", "initial_cost", "iterations",
+             "accepted", "seconds", "seed", "trajectory": [(iteration, seconds, cost, best)]}
+    """
+    start_time = time.perf_counter()
+    rng = random.Random(seed)
+    state = _State(snap, weights or WEIGHTS)
+    n_exams, n_cells, n_rooms = len(state.cell), state.n_cells, len(state.capacity)
+    initial = best = state.cost
+    best_cells, best_rooms = list(state.cell), list(state.room)
+    trajectory = [(0, 0.0, state.cost, best)]
+    every = max(1, iterations // samples)
+    next_sample = time_limit / samples if time_limit else None
+    accepted = it = 0
+    temp = t_start
+
+    if n_exams and n_cells:
+        while it < iterations:
+            if target_cost is not None and best <= target_cost:
+                break
+            if it & 255 == 0:
+                if stop is not None and it & 4095 == 0 and stop.is_set():
+                    break
+                progress = it / iterations
+                if time_limit is not None:
+                    elapsed = time.perf_counter() - start_time
+                    if elapsed >= time_limit:
+                        break
+                    progress = max(progress, elapsed / time_limit)
+                    if elapsed >= next_sample:
+                        trajectory.append((it, elapsed, state.cost, best))
+                        next_sample += time_limit / samples
+                temp = t_start * (t_end / t_start) ** progress
+            it += 1
+
+            i = rng.randrange(n_exams)
+            old_cell, old_room = state.cell[i], state.room[i]
+            if rng.random() < swap_share:
+                j = rng.randrange(n_exams)
+                other_cell, other_room = state.cell[j], state.room[j]
+                if other_cell == old_cell:
+                    continue
+                delta = state.remove(i) + state.remove(j)
+                if state.fits(i, other_cell, other_room):
+                    delta += state.add(i, other_cell, other_room)
+                    if state.fits(j, old_cell, old_room):
+                        delta += state.add(j, old_cell, old_room)
+                        if delta <= 0 or rng.random() < math.exp(-delta / temp):
+                            state.cost += delta
+                            accepted += 1
+                        else:
+                            state.remove(i)
+                            state.remove(j)
+                            state.add(i, old_cell, old_room)
+                            state.add(j, other_cell, other_room)
+                    else:
+                        state.remove(i)
+                        state.add(i, old_cell, old_room)
+                        state.add(j, other_cell, other_room)
+                else:
+                    state.add(i, old_cell, old_room)
+                    state.add(j, other_cell, other_room)
+            else:
+                cell = rng.randrange(n_cells)
+                delta = state.remove(i)
+                room = old_room if state.fits(i, cell, old_room) else rng.randrange(n_rooms)
+                if (cell, room) != (old_cell, old_room) and state.fits(i, cell, room):
+                    delta += state.add(i, cell, room)
+                    if delta <= 0 or rng.random() < math.exp(-delta / temp):
+                        state.cost += delta
+                        accepted += 1
+                    else:
+                        state.remove(i)
+                        state.add(i, old_cell, old_room)
+                else:
+                    state.add(i, old_cell, old_room)
+
+            if state.cost < best - 1e-9:
+                best = state.cost
+                best_cells, best_rooms = list(state.cell), list(state.room)
+            if it % every == 0:
+                trajectory.append((it, time.perf_counter() - start_time, state.cost, best))
+
+    seconds = time.perf_counter() - start_time
+    trajectory.append((it, seconds, state.cost, best))
+    return {
+        "cells": best_cells,
+        "rooms": best_rooms,
+        "cost": best,
+        "initial_cost": initial,
+        "iterations": it,
+        "accepted": accepted,
+        "seconds": seconds,
+        "seed": seed,
+        "trajectory": trajectory,
+    }
+
+
+# -------------------------------
+# Multi-start
+# -------------------------------
+
+# Set once per worker process by _init_worker, so the snapshot is pickled
+# once per worker instead of once per start
+_worker_snap = None
+_worker_stop = None
+
+
+def _init_worker(snap, stop):
+    global _worker_snap, _worker_stop
+    _worker_snap, _worker_stop = snap, stop
+
+
+def _anneal_start(seed, options):
+    """Worker: one seeded annealing run on the worker's snapshot (None once stopped)."""
+    if _worker_stop.is_set():
+        return None  # queued before the stop, never started
+    result = anneal(_worker_snap, seed=seed, stop=_worker_stop, **options)
+    if options.get("target_cost") is not None and result["cost"] <= options["target_cost"]:
+        _worker_stop.set()
+    return result
+
+
+def multi_start(snap, starts=8, workers=None, base_seed=0, **options):
+    """
+    Runs `starts` independent annealing runs, seeded base_seed,
+    base_seed + 1, ..., across a process pool and keeps the best. With
+    target_cost in options, the first run to reach it stops the others and
+    cancels the starts that have not begun.
+    options: anneal() keyword arguments (iterations, time_limit, weights, ...).
+    Returns the best run's result plus "starts": [(seed, cost, iterations, seconds)],
+    "workers" and "wall_seconds".
+    """
+    start_time = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, starts)
+    results = []
+    with multiprocessing.Manager() as manager:
+        stop = manager.Event()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snap, stop)) as pool:
+            pending = {pool.submit(_anneal_start, base_seed + k, options) for k in range(starts)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(r for r in (f.result() for f in done if not f.cancelled()) if r)
+                if stop.is_set():
+                    for future in pending:
+                        future.cancel()
+    best = min(results, key=lambda r: (r["cost"], r["seed"]))
+    best["starts"] = sorted((r["seed"], r["cost"], r["iterations"], r["seconds"]) for r in results)
+    best["workers"] = workers
+    best["wall_seconds"] = time.perf_counter() - start_time
+    return best
+
+
+# -------------------------------
+# Write back
+# -------------------------------
+
+def apply_solution(snap, result):
+    """Writes moved exams back in one transaction. Returns [(exam_id, date, slot, room)]."""
+    n_slots = len(snap["slots"])
+    changed = []
+    for exam_id, old_cell, old_room, cell, room in zip(
+            snap["exam_ids"], snap["cell"], snap["room"], result["cells"], result["rooms"]):
+        if (cell, room) != (old_cell, old_room):
+            changed.append((exam_id, snap["dates"][cell // n_slots], snap["slots"][cell % n_slots],
+                            snap["room_labels"][room]))
+    if changed:
+        scheduler.update_exams(changed, columns=("exam_date", "exam_slot", "room"))
+    return changed
+
+
+def optimize_period(period_id, iterations=200_000, time_limit=None, seed=0, weights=None,
+                    dry_run=False, skip_weekdays=(SUNDAY,), starts=1, workers=None):
+    """
+    Loads the period, anneals it and writes the best placement found back
+    (unless dry_run). starts > 1 runs that many seeded restarts in parallel
+    (see multi_start). Returns anneal()'s result plus
+    "moved": [(exam_id, date, slot, room)].
+    """
+    snap = load_snapshot(period_id, skip_weekdays)
+    if starts > 1:
+        result = multi_start(snap, starts=starts, workers=workers, base_seed=seed,
+                             iterations=iterations, time_limit=time_limit, weights=weights)
+    else:
+        result = anneal(snap, iterations=iterations, time_limit=time_limit, seed=seed, weights=weights)
+    if dry_run or result["cost"] >= result["initial_cost"]:
+        result["moved"] = []
+    else:
+        result["moved"] = apply_solution(snap, result)
+    return result
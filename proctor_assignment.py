@@ -0,0 +1,177 @@
+"""
+Proctor Assignment
+------------------
+Assigns proctors to every exam of a period at once:
+- Proctor pool (default: every faculty member), per-proctor unavailability
+  and a cap on exams per proctor per day
+- Greedy pass: each exam goes to the least-loaded proctor who is free in
+  its slot group, picked from a min-heap
+- Repair pass: exams move from the most-loaded proctor to lighter ones
+  until the maximum load cannot drop any further
+- Result written to exams.proctor in a single transaction
+"""
+
+import time
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+
+import scheduler
+from scheduler import db_query, list_exams, DATE, SLOT, PROCTOR, EXAM_ID
+from room_allocator import slot_groups
+from timeslots import slots_overlap
+
+
+def faculty_pool():
+    """Names of every faculty account, the default proctor pool."""
+    return [r[0] for r in db_query("SELECT name FROM accounts WHERE role='Faculty' ORDER BY name")]
+
+
+def _is_unavailable(blocked, date, slot):
+    """blocked holds dates and (date, slot) pairs; a pair blocks any overlapping slot."""
+    if date in blocked:
+        return True
+    return any(isinstance(b, tuple) and b[0] == date and slots_overlap(b[1], slot) for b in blocked)
+
+
+class _Loads:
+    """Per-proctor totals, per-day counts and busy slot groups."""
+
+    def __init__(self, proctors, unavailable, daily_cap):
+        self.total = dict.fromkeys(proctors, 0)
+        self.per_day = defaultdict(lambda: defaultdict(int))
+        self.groups = defaultdict(set)
+        self.unavailable = {p: set(v) for p, v in (unavailable or {}).items()}
+        self.daily_cap = daily_cap
+
+    def cap(self, proctor):
+        if isinstance(self.daily_cap, dict):
+            return self.daily_cap.get(proctor)
+        return self.daily_cap
+
+    def can_take(self, proctor, group, date, slot):
+        if group in self.groups[proctor]:
+            return False
+        cap = self.cap(proctor)
+        if cap is not None and self.per_day[proctor][date] >= cap:
+            return False
+        blocked = self.unavailable.get(proctor)
+        return not (blocked and _is_unavailable(blocked, date, slot))
+
+    def take(self, proctor, group, date):
+        self.total[proctor] += 1
+        self.per_day[proctor][date] += 1
+        self.groups[proctor].add(group)
+
+    def release(self, proctor, group, date):
+        self.total[proctor] -= 1
+        self.per_day[proctor][date] -= 1
+        self.groups[proctor].discard(group)
+
+
+def _greedy(groups, loads):
+    """Least-loaded free proctor per exam. Returns {exam_id: proctor} and the exams left over."""
+    heap = [(0, p) for p in loads.total]
+    heapify(heap)
+    chosen, unassigned = {}, []
+    for g, group in enumerate(groups):
+        for exam in group:
+            skipped, pick = [], None
+            while heap:
+                load, proctor = heappop(heap)
+                if load != loads.total[proctor]:
+                    continue  # stale heap entry
+                if loads.can_take(proctor, g, exam[DATE], exam[SLOT]):
+                    pick = proctor
+                    break
+                skipped.append((load, proctor))
+            for entry in skipped:
+                heappush(heap, entry)
+            if pick is None:
+                unassigned.append(exam)
+                continue
+            loads.take(pick, g, exam[DATE])
+            chosen[exam[EXAM_ID]] = pick
+            heappush(heap, (loads.total[pick], pick))
+    return chosen, unassigned
+
+
+def _repair(groups, loads, chosen):
+    """
+    Moves exams off the most-loaded proctor to one at least two exams
+    lighter, as long as such a move exists. Every move lowers the sum of
+    squared loads, so this always terminates.
+    """
+    exam_group = {}
+    held = defaultdict(list)
+    for g, group in enumerate(groups):
+        for exam in group:
+            exam_id = exam[EXAM_ID]
+            if exam_id in chosen:
+                exam_group[exam_id] = (g, exam)
+                held[chosen[exam_id]].append(exam_id)
+
+    moves = 0
+    while True:
+        by_load = sorted(loads.total, key=loads.total.get)
+        heaviest = by_load[-1] if by_load else None
+        if heaviest is None:
+            return moves
+        moved = False
+        for exam_id in held[heaviest]:
+            g, exam = exam_group[exam_id]
+            for proctor in by_load:
+                if loads.total[proctor] > loads.total[heaviest] - 2:
+                    break
+                if loads.can_take(proctor, g, exam[DATE], exam[SLOT]):
+                    loads.release(heaviest, g, exam[DATE])
+                    loads.take(proctor, g, exam[DATE])
+                    chosen[exam_id] = proctor
+                    held[heaviest].remove(exam_id)
+                    held[proctor].append(exam_id)
+                    moved = True
+                    break
+            if moved:
+                break
+        if not moved:
+            return moves
+        moves += 1
+
+
+def assign_proctors(period_id, proctors=None, unavailable=None, daily_cap=None, dry_run=False):
+    """
+    Re-assigns the proctor of every exam in the period, minimizing the
+    largest number of exams any one proctor has. Nobody proctors two exams
+    at overlapping times.
+    proctors: names to draw from (default: every faculty member).
+    unavailable: {proctor: iterable of dates or (date, slot) pairs}.
+    daily_cap: exams per proctor per day, as one int or {proctor: int}.
+    Exams no proctor can take keep their current proctor and are reported.
+    Returns {"assigned": [(exam_id, old_proctor, new_proctor)],
+             "unassigned": [(exam_date, exam_slot, exam_id)],
+             "loads": {proctor: {"total": n, "per_day": {date: n}}},
+             "max_load": n, "seconds": elapsed}
+    """
+    start_time = time.perf_counter()
+    if proctors is None:
+        proctors = faculty_pool()
+    exams = list_exams(period_id)
+    groups = slot_groups(exams)
+    loads = _Loads(proctors, unavailable, daily_cap)
+
+    chosen, left_over = _greedy(groups, loads)
+    _repair(groups, loads, chosen)
+
+    assigned = [(e[EXAM_ID], e[PROCTOR], chosen[e[EXAM_ID]]) for e in exams if e[EXAM_ID] in chosen]
+    changed = [(exam_id, new) for exam_id, old, new in assigned if new != old]
+    if changed and not dry_run:
+        scheduler.update_exams(changed, columns=("proctor",))
+
+    report = {p: {"total": n, "per_day": {d: c for d, c in sorted(loads.per_day[p].items()) if c}}
+              for p, n in sorted(loads.total.items(), key=lambda item: (-item[1], item[0]))}
+    return {
+        "assigned": assigned,
+        "unassigned": [(e[DATE], e[SLOT], e[EXAM_ID]) for e in left_over],
+        "loads": report,
+        "max_load": max(loads.total.values(), default=0),
+        "seconds": time.perf_counter() - start_time,
+    }
@@ -12,7 +12,7 @@ from tkinter import messagebox
 from scheduler import (
     get_faculty_credentials,
     set_faculty_qr_generated,
-    db_query,
+    db_read,
     get_current_period_id
 )
 
@@ -32,7 +32,7 @@ def generate_schedule_qr_code():
         return
 
     # Fetch all exams for the current period
-    exams = db_query("""
+    exams = db_read("""
         SELECT exam_date, exam_slot, subject_code, subject_description, section_id, faculty_username, proctor, room
         FROM exams
         WHERE period_id=?
@@ -53,7 +53,7 @@ def generate_schedule_qr_code():
     # Add each exam row
     for exam in exams:
         exam_date, slot, code, title, section_id, instructor, proctor, room = exam
-        sec_row = db_query("SELECT section_name FROM sections WHERE section_id=?", (section_id,))
+        sec_row = db_read("SELECT section_name FROM sections WHERE section_id=?", (section_id,))
         section_name = sec_row[0][0] if sec_row else "Unknown"
         subject = f"{code} - {title}"
         table += "{:<12} | {:<8} | {:<25} | {:<10} | {:<15} | {:<12} | {:<10}\n".format(
@@ -0,0 +1,210 @@
+"""
+Schedule Repair
+---------------
+Re-places only the exams hit by a closure (a room under repair, a holiday,
+a withdrawn time slot) and leaves every other exam where it is:
+- Affected exams are found through the exam indexes, never by loading the
+  whole period
+- Each one gets the smallest change that works: another room in the same
+  slot, then another slot on the same day, then the nearest other day
+- Only the days actually tried are read, so the work grows with the size
+  of the disruption rather than the size of the period
+"""
+
+import datetime
+import time
+from contextlib import nullcontext
+
+import scheduler
+from scheduler import EXAM_COLUMNS, DATE, SLOT, CODE, INSTRUCTOR, PROCTOR, ROOM, SECTION, EXAM_ID
+from autoschedule import SUNDAY
+from timeslots import slot_lane, slots_overlap
+
+
+class _Days:
+    """
+    Exams of the days looked at so far, loaded one day at a time, with the
+    rooms, proctors, instructors and sections busy at each (date, slot).
+    """
+
+    def __init__(self, conn, period_id):
+        self.conn = conn
+        self.period_id = period_id
+        self.rows = {}
+        self.busy_at = {}
+
+    def get(self, date):
+        rows = self.rows.get(date)
+        if rows is None:
+            rows = self.rows[date] = self.conn.execute(
+                f"SELECT {EXAM_COLUMNS} FROM exams WHERE period_id=? AND exam_date=?",
+                (self.period_id, date)).fetchall()
+        return rows
+
+    def busy(self, date, slot):
+        found = self.busy_at.get((date, slot))
+        if found is None:
+            found = self.busy_at[(date, slot)] = (set(), set(), set(), set())
+            rooms, proctors, instructors, sections = found
+            for other in self.get(date):
+                if slots_overlap(other[SLOT], slot):
+                    rooms.add(other[ROOM].lower())
+                    proctors.add(other[PROCTOR].lower())
+                    instructors.add(other[INSTRUCTOR].lower())
+                    sections.add(str(other[SECTION]))
+        return found
+
+    def _touch(self, date):
+        for key in [k for k in self.busy_at if k[0] == date]:
+            del self.busy_at[key]
+
+    def lift(self, row):
+        self.rows[row[DATE]] = [r for r in self.get(row[DATE]) if r[EXAM_ID] != row[EXAM_ID]]
+        self._touch(row[DATE])
+
+    def put(self, row):
+        self.get(row[DATE]).append(row)
+        for (date, slot), (rooms, proctors, instructors, sections) in self.busy_at.items():
+            if date == row[DATE] and slots_overlap(slot, row[SLOT]):
+                rooms.add(row[ROOM].lower())
+                proctors.add(row[PROCTOR].lower())
+                instructors.add(row[INSTRUCTOR].lower())
+                sections.add(str(row[SECTION]))
+
+
+def _find_affected(conn, period_id, dates, rooms, slots, date_slots, all_dates):
+    found = {}
+    for date in dates:
+        for row in conn.execute(f"SELECT {EXAM_COLUMNS} FROM exams WHERE period_id=? AND exam_date=?",
+                                (period_id, date)):
+            found[row[EXAM_ID]] = row
+    for room in rooms:
+        for row in conn.execute(f"SELECT {EXAM_COLUMNS} FROM exams WHERE period_id=? AND room=? COLLATE NOCASE",
+                                (period_id, room)):
+            found[row[EXAM_ID]] = row
+    pairs = set(date_slots) | {(d, s) for d in all_dates for s in slots}
+    for date, slot in pairs:
+        for row in conn.execute(f"SELECT {EXAM_COLUMNS} FROM exams WHERE period_id=? AND exam_date=? AND exam_slot=?",
+                                (period_id, date, slot)):
+            found[row[EXAM_ID]] = row
+    return sorted(found.values(), key=lambda r: (r[DATE], slot_lane(r[SLOT])[1:], r[CODE], r[EXAM_ID]))
+
+
+def repair_closures(period_id, rooms=(), dates=(), slots=(), date_slots=(), dry_run=False,
+                    skip_weekdays=(SUNDAY,)):
+    """
+    Moves the exams that use a blocked room, date, slot label or (date, slot)
+    pair, changing as little as possible; all other exams stay frozen.
+    Candidate rooms are the unblocked rooms, smallest that seats the section
+    first; candidate days run outward from the original date.
+    Reads and writes the moves in one transaction unless dry_run.
+    Returns {"moved": [{"exam_id", "code", "section", "from": (date, slot, room),
+                        "to": (date, slot, room), "change": "room" | "slot" | "date"}],
+             "unplaced": [{"exam_id", "code", "section", "from": (date, slot, room)}],
+             "seconds": elapsed}
+    """
+    start_time = time.perf_counter()
+    blocked_rooms = {r.lower() for r in rooms}
+    blocked_dates = set(dates)
+    blocked_slots = set(slots)
+    blocked_pairs = set(date_slots)
+
+    # Reads and moves share one write transaction, so no booking can slip in
+    # between finding a free room and taking it; a dry run only reads.
+    transaction = nullcontext(scheduler.get_connection(readonly=True)) if dry_run else scheduler.write_transaction()
+    with transaction as conn:
+        period = conn.execute("SELECT start_date, end_date FROM exam_periods WHERE period_id=?",
+                              (period_id,)).fetchone()
+        if period is None:
+            raise ValueError(f"No exam period with id {period_id}")
+        first, last = (datetime.date.fromisoformat(d.strip()) for d in period)
+        calendar = [(first + datetime.timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+        affected = _find_affected(conn, period_id, blocked_dates, blocked_rooms, blocked_slots,
+                                  blocked_pairs, calendar)
+
+        open_days = [d for d in calendar
+                     if d not in blocked_dates and datetime.date.fromisoformat(d).weekday() not in skip_weekdays]
+        grid_slots = sorted((r[0] for r in conn.execute("SELECT slot_label FROM time_slots")
+                             if r[0] not in blocked_slots), key=lambda s: slot_lane(s)[1:])
+        room_list = [(cap if cap is not None else float("inf"), label)
+                     for label, cap in conn.execute("SELECT room_label, capacity FROM rooms")
+                     if (label or "").strip() and label.lower() not in blocked_rooms]
+        room_list.sort()
+        days = _Days(conn, period_id)
+
+        sizes = {}
+
+        def section_size(section_id):
+            if section_id not in sizes:
+                sizes[section_id] = conn.execute("SELECT COUNT(*) FROM enrollments WHERE section_id=?",
+                                                 (section_id,)).fetchone()[0]
+            return sizes[section_id]
+
+        def free_room(exam, date, slot, room_only=False):
+            """
+            A room for exam at (date, slot), or None if that slot is out for it.
+            room_only: the exam keeps its slot, so clashes its proctor, instructor
+            or section already had there are not the move's doing; only rooms count.
+            """
+            rooms, proctors, instructors, sections = days.busy(date, slot)
+            if not room_only and (exam[PROCTOR].lower() in proctors or exam[INSTRUCTOR].lower() in instructors
+                                  or str(exam[SECTION]) in sections):
+                return None
+            size = section_size(exam[SECTION])
+            fitting = [label for cap, label in room_list if cap >= size] or [label for _cap, label in reversed(room_list)]
+            if exam[ROOM] in fitting:
+                fitting.remove(exam[ROOM])
+                fitting.insert(0, exam[ROOM])  # keep the room if it is still usable
+            return next((r for r in fitting if r.lower() not in rooms), None)
+
+        def usable(date, slot):
+            return (date not in blocked_dates and slot not in blocked_slots
+                    and (date, slot) not in blocked_pairs)
+
+        moved, unplaced = [], []
+        for exam in affected:
+            days.lift(exam)
+            target, change = None, None
+            # 1. Same date and slot, another room
+            if usable(exam[DATE], exam[SLOT]):
+                room = free_room(exam, exam[DATE], exam[SLOT], room_only=True)
+                if room is not None:
+                    target, change = (exam[DATE], exam[SLOT], room), "room"
+            # 2. Same date, another slot
+            if target is None and exam[DATE] in open_days:
+                for slot in grid_slots:
+                    if slot != exam[SLOT] and usable(exam[DATE], slot):
+                        room = free_room(exam, exam[DATE], slot)
+                        if room is not None:
+                            target, change = (exam[DATE], slot, room), "slot"
+                            break
+            # 3. Nearest other day, preferring the original slot
+            if target is None:
+                origin = datetime.date.fromisoformat(exam[DATE])
+                others = sorted((d for d in open_days if d != exam[DATE]),
+                                key=lambda d: (abs((datetime.date.fromisoformat(d) - origin).days), d))
+                ordered_slots = sorted(grid_slots, key=lambda s: s != exam[SLOT])
+                for date in others:
+                    for slot in ordered_slots:
+                        if usable(date, slot):
+                            room = free_room(exam, date, slot)
+                            if room is not None:
+                                target, change = (date, slot, room), "date"
+                                break
+                    if target is not None:
+                        break
+
+            entry = {"exam_id": exam[EXAM_ID], "code": exam[CODE], "section": exam[SECTION],
+                     "from": (exam[DATE], exam[SLOT], exam[ROOM])}
+            if target is None:
+                days.put(exam)
+                unplaced.append(entry)
+                continue
+            days.put(target[:2] + exam[CODE:ROOM] + target[2:] + exam[SECTION:])
+            moved.append(dict(entry, to=target, change=change))
+
+        if moved and not dry_run:
+            scheduler.update_exams([(m["exam_id"],) + m["to"] for m in moved],
+                                   columns=("exam_date", "exam_slot", "room"))
+
+    return {"moved": moved, "unplaced": unplaced, "seconds": time.perf_counter() - start_time}
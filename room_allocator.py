@@ -0,0 +1,147 @@
+"""
+Room Allocator
+--------------
+Assigns rooms to a period's exams once their dates and slots are fixed,
+using rooms.capacity and section sizes (number of enrolled students).
+
+Each date's overlapping slots form one matching problem between exams and
+rooms. An exam can use any room at least as large as its section, so the
+candidate room sets are nested; taking exams largest first and giving each
+the smallest room that still fits yields a maximum matching with the least
+total empty seats.
+"""
+
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+import scheduler
+from scheduler import db_query, list_exams, DATE, SLOT, ROOM, SECTION, EXAM_ID
+from timeslots import slot_lane
+
+# Capacity of a room an exam names but the rooms table does not seat
+UNKNOWN_CAPACITY = float("inf")
+
+
+def section_sizes():
+    """str(section_id) -> number of enrolled students."""
+    return {str(sid): n for sid, n in
+            db_query("SELECT section_id, COUNT(*) FROM enrollments GROUP BY section_id")}
+
+
+def room_capacities():
+    """
+    [(capacity, room_label)] sorted by capacity. Rows with a blank label or no
+    recorded capacity are left out: nothing can be seated in them safely.
+    """
+    rooms = [(cap, label) for label, cap in db_query("SELECT room_label, capacity FROM rooms")
+             if (label or "").strip() and cap is not None]
+    return sorted(rooms)
+
+
+def slot_groups(exams):
+    """
+    Splits exams into groups that must all get different rooms: per date,
+    each connected run of overlapping slot times.
+    """
+    by_date = defaultdict(list)
+    for exam in exams:
+        lane, start, end = slot_lane(exam[SLOT])
+        by_date[(exam[DATE], lane)].append((start, end, exam))
+    groups = []
+    for items in by_date.values():
+        items.sort(key=lambda it: (it[0], it[1]))
+        run, run_end = [], None
+        for start, end, exam in items:
+            if run and start >= run_end:
+                groups.append(run)
+                run, run_end = [], None
+            run.append(exam)
+            run_end = end if run_end is None else max(run_end, end)
+        groups.append(run)
+    return groups
+
+
+def match_rooms(exams, rooms, sizes):
+    """
+    Best-fit decreasing for one slot group.
+    Returns (assignments, unsatisfied): assignments is [(exam, room_label, capacity, size)],
+    unsatisfied is [(exam, size, reason)] for exams that did not get a large enough room.
+    Exams that do not fit still get the largest rooms left over; only when
+    rooms run out does an exam get none. Such an exam keeps its current room,
+    so any exam that would move into that room stays put instead and is
+    reported as unsatisfied as well.
+    """
+    free = list(rooms)
+    caps = [c for c, _ in free]
+    assignments, unsatisfied, short = [], [], []
+    for exam in sorted(exams, key=lambda e: -sizes.get(str(e[SECTION]), 0)):
+        size = sizes.get(str(exam[SECTION]), 0)
+        i = bisect_left(caps, size)
+        if i == len(free):
+            short.append((exam, size))
+            continue
+        cap, label = free.pop(i)
+        caps.pop(i)
+        assignments.append((exam, label, cap, size))
+    for exam, size in short:
+        if not free:
+            unsatisfied.append((exam, size, "no free room left"))
+            continue
+        cap, label = free.pop()
+        caps.pop()
+        assignments.append((exam, label, cap, size))
+        unsatisfied.append((exam, size, f"room '{label}' seats only {cap}"))
+
+    # Exams left without a room stay in their current one, so nobody else may
+    # move into it; whoever is held back keeps its own room in turn.
+    held = {exam[ROOM].lower(): exam for exam, _size, reason in unsatisfied if reason == "no free room left"}
+    while held:
+        blocked = [a for a in assignments
+                   if a[1].lower() in held and a[1].lower() != a[0][ROOM].lower()]
+        if not blocked:
+            break
+        for exam, label, _cap, size in blocked:
+            holder = held[label.lower()]
+            assignments.remove((exam, label, _cap, size))
+            unsatisfied[:] = [u for u in unsatisfied if u[0] is not exam]
+            unsatisfied.append((exam, size, f"room '{label}' is still held by exam {holder[EXAM_ID]}, "
+                                            f"which has no room to move to"))
+            held.setdefault(exam[ROOM].lower(), exam)
+    return assignments, unsatisfied
+
+
+def allocate_rooms(period_id, dry_run=False):
+    """
+    Re-assigns the room of every exam in the period by capacity fit and
+    writes exams.room back in one transaction (unless dry_run).
+    Exams that cannot be seated are reported; if no room at all is left for
+    them they keep their current one, and exams that would have moved into
+    it are left unchanged and reported too.
+    Returns {"assigned": [(exam_id, old_room, new_room, size, capacity)],
+             "unsatisfied": [(exam_date, exam_slot, exam_id, size, reason)],
+             "empty_seats": total, "seconds": elapsed}
+    """
+    start_time = time.perf_counter()
+    sizes = section_sizes()
+    rooms = room_capacities()
+
+    assigned, unsatisfied, empty_seats = [], [], 0
+    for group in slot_groups(list_exams(period_id)):
+        matches, failed = match_rooms(group, rooms, sizes)
+        for exam, label, cap, size in matches:
+            assigned.append((exam[EXAM_ID], exam[ROOM], label, size, cap))
+            empty_seats += max(0, cap - size)
+        for exam, size, reason in failed:
+            unsatisfied.append((exam[DATE], exam[SLOT], exam[EXAM_ID], size, reason))
+
+    changed = [(exam_id, new) for exam_id, old, new, _size, _cap in assigned if new != old]
+    if changed and not dry_run:
+        scheduler.update_exams(changed, columns=("room",))
+
+    return {
+        "assigned": assigned,
+        "unsatisfied": unsatisfied,
+        "empty_seats": empty_seats,
+        "seconds": time.perf_counter() - start_time,
+    }
@@ -1,73 +1,348 @@
+import os
+import random
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
 
 DB_NAME = "exam_scheduler.db"
 
+# ------------------ Connections ------------------
+# One open connection per thread (and per database file), reused by every
+# helper below instead of connecting on each call. Each connection keeps its
+# own cache of prepared statements, so repeated queries skip parsing too.
+# The database runs in WAL mode so several GUI users can read while one of
+# them writes; pure read paths use a separate read-only connection.
+STATEMENT_CACHE_SIZE = 256
+CACHE_SIZE_KIB = 16384     # page cache per connection
+BUSY_TIMEOUT = 2.0         # seconds SQLite itself waits for a lock, per attempt
+WRITE_RETRIES = 5          # further BEGIN IMMEDIATE attempts after the first
+RETRY_BACKOFF = 0.05       # seconds before the first retry, doubled each time
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+_generation = 0  # bumped by close_connections() so every thread reconnects
+
+def _open(readonly):
+    if readonly:
+        conn = sqlite3.connect(f"file:{os.path.abspath(DB_NAME)}?mode=ro", uri=True,
+                               timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+    else:
+        conn = sqlite3.connect(DB_NAME, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        # journal_mode is stored in the file; switching needs a moment without other users
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass
+        conn.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, fsyncs only at checkpoints
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB:d}")
+    return conn
+
+def get_connection(readonly=False):
+    """
+    The calling thread's connection to DB_NAME, opened on first use.
+    readonly=True gives a separate read-only connection for pure reads; it
+    falls back to the writable one while the database file does not exist.
+    """
+    # Keyed by process too: a connection inherited through fork must not be reused
+    key = (os.getpid(), DB_NAME, readonly)
+    pool = getattr(_local, "connections", None)
+    if pool is None or _local.generation != _generation:
+        pool = _local.connections = {}
+        _local.generation = _generation
+    conn = pool.get(key)
+    if conn is None:
+        if readonly and not os.path.exists(DB_NAME):
+            return get_connection()
+        conn = _open(readonly)
+        pool[key] = conn
+        with _connections_lock:
+            _connections.append((readonly, conn))
+    return conn
+
+def close_connections():
+    """Closes every connection opened by get_connection(); call on shutdown or before switching DB_NAME."""
+    global _generation
+    with _connections_lock:
+        conns = _connections[:]
+        _connections.clear()
+        _generation += 1
+    # Read-only connections first: the last writer to close checkpoints and removes the WAL
+    for _readonly, conn in sorted(conns, key=lambda c: not c[0]):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+# ------------------ Write locking ------------------
+_lock_stats = {"writes": 0, "waited": 0, "retries": 0, "failures": 0,
+               "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+_lock_stats_lock = threading.Lock()
+
+def lock_wait_metrics():
+    """
+    Counters for the write lock since start-up (or reset_lock_wait_metrics()):
+    writes, writes that had to wait, retries, writes that gave up, and the
+    total and longest seconds spent waiting for the lock.
+    """
+    with _lock_stats_lock:
+        return dict(_lock_stats)
+
+def reset_lock_wait_metrics():
+    with _lock_stats_lock:
+        for key in _lock_stats:
+            _lock_stats[key] = 0.0 if key.endswith("seconds") else 0
+
+def _is_busy(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+@contextmanager
+def write_transaction():
+    """
+    Yields the thread's connection inside BEGIN IMMEDIATE, then commits (or
+    rolls back on error). Taking the write lock up front means a transaction
+    never fails half-way for want of it. A busy lock is retried up to
+    WRITE_RETRIES times with exponential backoff before the error is raised;
+    the time spent waiting is recorded in lock_wait_metrics().
+    Nested calls on the same thread join the outer transaction, which
+    commits or rolls back everything at once.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    start = time.perf_counter()
+    retries = 0
+    while True:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            break
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e) or retries >= WRITE_RETRIES:
+                with _lock_stats_lock:
+                    _lock_stats["failures"] += 1
+                raise
+            time.sleep(RETRY_BACKOFF * (2 ** retries) * random.uniform(0.5, 1.5))
+            retries += 1
+    waited = time.perf_counter() - start
+    with _lock_stats_lock:
+        _lock_stats["writes"] += 1
+        _lock_stats["retries"] += retries
+        _lock_stats["wait_seconds"] += waited
+        _lock_stats["max_wait_seconds"] = max(_lock_stats["max_wait_seconds"], waited)
+        if retries or waited > 0.001:
+            _lock_stats["waited"] += 1
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
 # ------------------ DB helpers ------------------
 def db_query(sql, params=()):
-    with sqlite3.connect(DB_NAME, timeout=30) as conn:
-        cur = conn.cursor()
-        cur.execute(sql, params)
-        return cur.fetchall()
+    return get_connection().execute(sql, params).fetchall()
+
+def db_read(sql, params=()):
+    """db_query on the read-only connection, for listings and exports that never write."""
+    return get_connection(readonly=True).execute(sql, params).fetchall()
 
 def db_execute(sql, params=()):
-    with sqlite3.connect(DB_NAME, timeout=30) as conn:
-        cur = conn.cursor()
-        cur.execute(sql, params)
-        conn.commit()
+    with write_transaction() as conn:
+        return conn.execute(sql, params).lastrowid
+
+def db_iter(sql, params=()):
+    """Like db_read, but yields rows as SQLite produces them instead of fetching all."""
+    yield from get_connection(readonly=True).execute(sql, params)
+
+def db_signature():
+    """Cheap fingerprint of the database file; changes on every committed write."""
+    try:
+        st = os.stat(DB_NAME)
+    except OSError:
+        return None
+    # In WAL mode commits land in the -wal file; the main file only changes at checkpoints
+    try:
+        wal = os.stat(DB_NAME + "-wal")
+        wal = (wal.st_mtime_ns, wal.st_size)
+    except OSError:
+        wal = None
+    return (st.st_mtime_ns, st.st_size, wal)
+
+# ------------------ Change notification ------------------
+# Callables run as hook(action, exam_id, row, before) after each exam write made
+# through this module. action is "add", "update", "delete" or "reset" (many rows
+# changed); row is the exam as returned by get_exam(), None for deletes and
+# resets; before is the db_signature() taken just before the write. Modules
+# that write exams with their own SQL call notify_exam_change() after commit.
+exam_change_hooks = []
+
+def notify_exam_change(action, exam_id, row, before):
+    for hook in exam_change_hooks:
+        hook(action, exam_id, row, before)
 
 # ------------------ Schema setup ------------------
-def ensure_schema():
-    # Settings
-    db_execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
-    # Accounts
-    db_execute("""
+# The schema is versioned with PRAGMA user_version: MIGRATIONS[i] takes a
+# database from version i to i + 1. Each step is idempotent, so databases
+# built by older releases, by setup_db.py or edited by hand (whatever their
+# user_version says) are brought to the same shape. To change the schema,
+# append a step; never edit one that has shipped.
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _add_column(conn, table, column, definition):
+    if column not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def _migrate_tables(conn):
+    """Creates any missing table, with the constraints setup_db.py has always used."""
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS accounts (
-            username   TEXT PRIMARY KEY,
-            password   TEXT NOT NULL,
-            name       TEXT NOT NULL,
-            department TEXT NOT NULL,
-            role       TEXT NOT NULL
+            username     TEXT PRIMARY KEY,
+            password     TEXT NOT NULL,
+            name         TEXT NOT NULL,
+            department   TEXT,
+            role         TEXT NOT NULL CHECK (role IN ('Faculty', 'Admin')),
+            qr_generated INTEGER DEFAULT 0
         )
     """)
-    # Subjects
-    db_execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS subjects (
-            code       TEXT NOT NULL,
+            code       TEXT PRIMARY KEY,
             title      TEXT NOT NULL,
             orig_time  TEXT NOT NULL,
             instructor TEXT NOT NULL,
-            PRIMARY KEY (code, title)
+            section_name TEXT
         )
     """)
-    # Time slots
-    db_execute("CREATE TABLE IF NOT EXISTS time_slots (slot_label TEXT PRIMARY KEY)")
-    # Rooms
-    db_execute("CREATE TABLE IF NOT EXISTS rooms (room_label TEXT PRIMARY KEY)")
-    # Exam periods
-    db_execute("""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sections (
+            section_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+            section_name TEXT NOT NULL UNIQUE,
+            year_level   INTEGER,
+            department   TEXT
+        )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS time_slots (slot_label TEXT PRIMARY KEY)")
+    conn.execute("CREATE TABLE IF NOT EXISTS rooms (room_label TEXT PRIMARY KEY, capacity INTEGER)")
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS exam_periods (
             period_id   INTEGER PRIMARY KEY AUTOINCREMENT,
             semester    TEXT NOT NULL,
             start_date  TEXT NOT NULL,
             end_date    TEXT NOT NULL,
-            period_type TEXT NOT NULL
+            period_type TEXT NOT NULL DEFAULT 'Final Exams'
         )
     """)
-    # Exams
-    db_execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS exams (
-            exam_id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            id                  INTEGER PRIMARY KEY AUTOINCREMENT,
             faculty_username    TEXT NOT NULL,
             subject_code        TEXT NOT NULL,
             subject_description TEXT NOT NULL,
+            section_id          INTEGER NOT NULL,
             exam_date           TEXT NOT NULL,
             exam_slot           TEXT NOT NULL,
             proctor             TEXT NOT NULL,
             room                TEXT NOT NULL,
-            period_id           INTEGER NOT NULL
+            period_id           INTEGER NOT NULL,
+            FOREIGN KEY (faculty_username) REFERENCES accounts (username),
+            FOREIGN KEY (subject_code) REFERENCES subjects (code),
+            FOREIGN KEY (section_id) REFERENCES sections (section_id),
+            FOREIGN KEY (period_id) REFERENCES exam_periods (period_id)
+        )
+    """)
+    # Student enrollments (student <-> section)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS enrollments (
+            student_id TEXT    NOT NULL,
+            section_id INTEGER NOT NULL,
+            PRIMARY KEY (student_id, section_id)
         )
     """)
 
+def _migrate_exam_id(conn):
+    """Early databases named the exam key exam_id; everything reads id."""
+    columns = _columns(conn, "exams")
+    if "exam_id" in columns and "id" not in columns:
+        conn.execute("ALTER TABLE exams RENAME COLUMN exam_id TO id")
+
+def _migrate_columns(conn):
+    """Columns that were added to existing databases by hand."""
+    _add_column(conn, "exams", "section_id", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "subjects", "section_name", "TEXT")
+    _add_column(conn, "accounts", "qr_generated", "INTEGER DEFAULT 0")
+    _add_column(conn, "exam_periods", "period_type", "TEXT NOT NULL DEFAULT 'Final Exams'")
+    _add_column(conn, "rooms", "capacity", "INTEGER")
+    _add_column(conn, "sections", "department", "TEXT")  # filled by populate_all.py
+
+def _migrate_indexes(conn):
+    """Indexes behind the hot lookups."""
+    # Spelled out rather than read from EXAM_INDEXES, which grows with later steps
+    for name, target in (
+        ("idx_exams_room",       "exams (period_id, exam_date, exam_slot, room COLLATE NOCASE)"),
+        ("idx_exams_proctor",    "exams (period_id, exam_date, exam_slot, proctor COLLATE NOCASE)"),
+        ("idx_exams_instructor", "exams (period_id, exam_date, exam_slot, faculty_username COLLATE NOCASE)"),
+        ("idx_exams_section",    "exams (period_id, exam_date, exam_slot, section_id)"),
+        ("idx_exams_faculty",    "exams (faculty_username, period_id, exam_date)"),
+        ("idx_exams_room_only",  "exams (period_id, room COLLATE NOCASE)"),
+    ):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_section ON enrollments (section_id, student_id)")
+    # Faculty subject lists: WHERE instructor=? ORDER BY code
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_subjects_instructor ON subjects (instructor, code, title)")
+    # Section lookups by name (hand-built tables may lack the UNIQUE constraint)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sections_name ON sections (section_name)")
+
+def _migrate_subject_index(conn):
+    """Per-subject lookups of a period (one exam per subject, see validation.py)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exams_subject ON exams (period_id, subject_code, subject_description)")
+
+MIGRATIONS = [_migrate_tables, _migrate_exam_id, _migrate_columns, _migrate_indexes,
+              _migrate_subject_index]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def schema_version():
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+def ensure_schema():
+    """
+    Brings the database to SCHEMA_VERSION. When it is already there this is
+    a single PRAGMA read; otherwise the pending migrations run in order in
+    one transaction. Returns the number of migrations applied.
+    """
+    if schema_version() >= SCHEMA_VERSION:
+        return 0
+    with write_transaction() as conn:
+        # Re-read under the write lock: another process may have just migrated
+        version = schema_version()
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION:d}")
+    return max(0, SCHEMA_VERSION - version)
+
+# Composite indexes behind the conflict queries, list_exams(), date paging,
+# room-closure repairs and the one-exam-per-subject check.
+# Text columns compared case-insensitively are indexed with COLLATE NOCASE.
+# Created by the migrations above, which spell out their own copies; a new
+# index goes here and in a new migration step.
+EXAM_INDEXES = {
+    "idx_exams_room":       "exams (period_id, exam_date, exam_slot, room COLLATE NOCASE)",
+    "idx_exams_proctor":    "exams (period_id, exam_date, exam_slot, proctor COLLATE NOCASE)",
+    "idx_exams_instructor": "exams (period_id, exam_date, exam_slot, faculty_username COLLATE NOCASE)",
+    "idx_exams_section":    "exams (period_id, exam_date, exam_slot, section_id)",
+    "idx_exams_faculty":    "exams (faculty_username, period_id, exam_date)",
+    "idx_exams_room_only":  "exams (period_id, room COLLATE NOCASE)",
+    "idx_exams_subject":    "exams (period_id, subject_code, subject_description)",
+}
+
 # ------------------ Settings helpers ------------------
 def settings_get(key, default=None):
     rows = db_query("SELECT value FROM settings WHERE key=?", (key,))
@@ -94,34 +369,134 @@ def current_period_display():
     return f"{sem} {pt} ({sd} to {ed})"
 
 # ------------------ Exam management ------------------
+# Column positions in exam rows (list_exams / get_exam)
+DATE, SLOT, CODE, TITLE, INSTRUCTOR, PROCTOR, ROOM, SECTION, EXAM_ID, PERIOD = range(10)
+
+EXAM_COLUMNS = """exam_date, exam_slot, subject_code, subject_description,
+                   faculty_username, proctor, room, section_id, id"""
+
 def add_exam(faculty_username, subject_code, subject_description,
              exam_date, exam_slot, proctor, room, period_id, section_id):
-    db_execute("""
+    before = db_signature()
+    exam_id = db_execute("""
         INSERT INTO exams (faculty_username, subject_code, subject_description,
                            exam_date, exam_slot, proctor, room, period_id, section_id)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (faculty_username.strip(), subject_code.strip(), subject_description.strip(),
           exam_date, exam_slot.strip(), proctor.strip(), room.strip(), period_id, section_id))
+    notify_exam_change("add", exam_id, get_exam(exam_id), before)
+    return exam_id
+
+def update_exam(exam_id, exam_date, exam_slot, proctor, room):
+    before = db_signature()
+    db_execute("""
+        UPDATE exams SET exam_date=?, exam_slot=?, proctor=?, room=?
+        WHERE id=?
+    """, (exam_date, exam_slot.strip(), proctor.strip(), room.strip(), exam_id))
+    notify_exam_change("update", exam_id, get_exam(exam_id), before)
+
+def delete_exam(exam_id):
+    before = db_signature()
+    db_execute("DELETE FROM exams WHERE id=?", (exam_id,))
+    notify_exam_change("delete", exam_id, None, before)
+
+def get_exam(exam_id):
+    """Returns the exam row in list_exams() shape, with its period_id appended."""
+    rows = db_query(f"SELECT {EXAM_COLUMNS}, period_id FROM exams WHERE id=?", (exam_id,))
+    return rows[0] if rows else None
 
 def list_exams(period_id, faculty_username=None):
+    """Rows are (date, slot, code, title, faculty_username, proctor, room, section_id, id)."""
     if faculty_username:
-        return db_query("""
-            SELECT exam_date, exam_slot, subject_code, subject_description,
-                   faculty_username, proctor, room, section_id
+        return db_read(f"""
+            SELECT {EXAM_COLUMNS}
             FROM exams
             WHERE faculty_username=? AND period_id=?
             ORDER BY exam_date, exam_slot, subject_code
         """, (faculty_username, period_id))
     else:
-        return db_query("""
-            SELECT exam_date, exam_slot, subject_code, subject_description,
-                   faculty_username, proctor, room, section_id
+        return db_read(f"""
+            SELECT {EXAM_COLUMNS}
             FROM exams
             WHERE period_id=?
             ORDER BY exam_date, exam_slot, subject_code
         """, (period_id,))
 
 
+# ------------------ Bulk exam writes ------------------
+# Batch versions of add/update/delete for imports, auto-scheduling and other
+# bulk changes: rows go through executemany, CHUNK_SIZE at a time so only one
+# chunk is held in memory, and the whole batch commits once (all or nothing).
+# The hooks get a single "reset" instead of one call per row.
+CHUNK_SIZE = 5000
+
+UPDATABLE_COLUMNS = ("exam_date", "exam_slot", "proctor", "room")
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+def add_exams(exams, chunk_size=CHUNK_SIZE):
+    """
+    Inserts many exams in one transaction. exams is an iterable of tuples in
+    add_exam()'s argument order. Returns the new exam ids, in input order.
+    """
+    before = db_signature()
+    ids = []
+    with write_transaction() as conn:
+        for chunk in _chunks(exams, chunk_size):
+            conn.executemany("""
+                INSERT INTO exams (faculty_username, subject_code, subject_description,
+                                   exam_date, exam_slot, proctor, room, period_id, section_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [tuple(_strip(v) for v in exam) for exam in chunk])
+            # The write lock is ours, so the chunk got consecutive ids ending here
+            last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            ids.extend(range(last - len(chunk) + 1, last + 1))
+    if ids:
+        notify_exam_change("reset", None, None, before)
+    return ids
+
+def update_exams(changes, columns=UPDATABLE_COLUMNS, chunk_size=CHUNK_SIZE):
+    """
+    Updates many exams in one transaction. changes is an iterable of
+    (exam_id, value, ...) with one value per name in columns (by default
+    update_exam()'s: exam_date, exam_slot, proctor, room).
+    Returns the number of rows changed.
+    """
+    unknown = set(columns) - set(UPDATABLE_COLUMNS)
+    if unknown or not columns:
+        raise ValueError(f"Cannot bulk-update exam columns: {sorted(unknown) or 'none given'}")
+    sql = f"UPDATE exams SET {', '.join(f'{c}=?' for c in columns)} WHERE id=?"
+    before = db_signature()
+    changed = 0
+    with write_transaction() as conn:
+        for chunk in _chunks(changes, chunk_size):
+            changed += conn.executemany(sql, [tuple(_strip(v) for v in row[1:]) + (row[0],)
+                                              for row in chunk]).rowcount
+    if changed:
+        notify_exam_change("reset", None, None, before)
+    return changed
+
+def delete_exams(exam_ids, chunk_size=CHUNK_SIZE):
+    """Deletes many exams in one transaction. Returns the number of rows deleted."""
+    before = db_signature()
+    deleted = 0
+    with write_transaction() as conn:
+        for chunk in _chunks(exam_ids, chunk_size):
+            deleted += conn.executemany("DELETE FROM exams WHERE id=?", [(i,) for i in chunk]).rowcount
+    if deleted:
+        notify_exam_change("reset", None, None, before)
+    return deleted
+
+
 # ------------------ Account management ------------------
 def create_faculty_account(username, password, name, department):
     if db_query("SELECT 1 FROM accounts WHERE username=?", (username,)):
@@ -139,7 +514,9 @@ def reset_faculty_password(username):
 def delete_faculty_account(username):
     if not db_query("SELECT 1 FROM accounts WHERE username=? AND role='Faculty'", (username,)):
         raise ValueError(f"No faculty found: {username}")
+    before = db_signature()
     db_execute("DELETE FROM exams WHERE faculty_username=?", (username,))
+    notify_exam_change("reset", None, None, before)
     db_execute("DELETE FROM accounts WHERE username=?", (username,))
 
 def list_faculty_accounts():
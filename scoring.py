@@ -0,0 +1,160 @@
+"""
+Schedule Scoring
+----------------
+How hard a period is on students, per section and day:
+- Exams beyond the second on one day
+- Back-to-back exams (adjacent time slots)
+- Short gaps (fewer than MIN_GAP free slots between two exams)
+Each (section, date) keeps a bitmap of the slots it sits, so every spacing
+penalty is a couple of shifts, ANDs and popcounts over all slots at once.
+Free-text slots (e.g. "TBA") have no place in time and only count toward the
+day's total. Scores are kept current through the exam write hooks in
+scheduler and rebuilt only when the database file changed behind our back.
+"""
+
+from collections import defaultdict
+
+import scheduler
+from scheduler import db_query, list_exams, DATE, SLOT, SECTION, EXAM_ID, PERIOD
+from timeslots import slot_lane
+
+PENALTIES = {
+    "over_two_per_day": 3.0,  # per exam beyond the second on one day
+    "back_to_back": 1.0,      # per pair of adjacent slots
+    "short_gap": 0.5,         # per pair with fewer than MIN_GAP free slots between
+}
+MIN_GAP = 1
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+
+def day_penalties(mask, exams, min_gap=MIN_GAP):
+    """
+    (exams over two, back-to-back pairs, short-gap pairs) for one section-day:
+    exams sat that day, mask the bitmap of their timed slots.
+    """
+    over = max(0, exams - 2)
+    back_to_back = _popcount(mask & (mask >> 1))
+    short, between = 0, 0
+    for gap in range(1, min_gap + 1):
+        between |= mask >> gap
+        short += _popcount(mask & (mask >> (gap + 1)) & ~between)
+    return over, back_to_back, short
+
+
+class ScheduleScore:
+    def __init__(self, min_gap=MIN_GAP):
+        self.min_gap = min_gap
+        self.period_id = None
+        self.signature = None
+        self.rebuilds = 0
+        self.slot_index = {}                 # readable slot label -> bit position, in time order
+        self.counts = {}                     # (section, date) -> {bit or None (free text): exams}
+        self.masks = {}                      # (section, date) -> bitmap
+        self.penalties = {}                  # (section, date) -> day_penalties()
+        self.rows = {}                       # exam_id -> (section, date, bit)
+        self.totals = [0, 0, 0]
+
+    # ---- maintenance ----
+    def invalidate(self):
+        self.period_id = None
+        self.signature = None
+
+    def ensure(self, period_id):
+        if (period_id != self.period_id or self.signature is None
+                or self.signature != scheduler.db_signature()):
+            self.rebuild(period_id)
+
+    def rebuild(self, period_id):
+        # Stamp before reading, so a write racing the load forces another rebuild
+        self.signature = scheduler.db_signature()
+        self.period_id = period_id
+        exams = list_exams(period_id)
+        labels = {r[0] for r in db_query("SELECT slot_label FROM time_slots")} | {e[SLOT] for e in exams}
+        # Readable labels in time order; free-text ones get no bit
+        order = sorted((s for s in labels if slot_lane(s)[0] is None), key=lambda s: slot_lane(s)[1:])
+        self.slot_index = {label: i for i, label in enumerate(order)}
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self.rows = {}
+        for exam in exams:
+            key, bit = (str(exam[SECTION]), exam[DATE]), self.slot_index.get(exam[SLOT])
+            self.counts[key][bit] += 1
+            self.rows[exam[EXAM_ID]] = key + (bit,)
+        self.masks, self.penalties, self.totals = {}, {}, [0, 0, 0]
+        for key in self.counts:
+            self._rescore(key)
+        self.rebuilds += 1
+
+    def _rescore(self, key):
+        old = self.penalties.pop(key, (0, 0, 0))
+        bits = self.counts.get(key) or {}
+        mask = 0
+        for bit, n in bits.items():
+            if n and bit is not None:
+                mask |= 1 << bit
+        exams = sum(bits.values())
+        new = day_penalties(mask, exams, self.min_gap) if exams else (0, 0, 0)
+        if exams:
+            self.masks[key] = mask
+            self.penalties[key] = new
+        else:
+            self.masks.pop(key, None)
+            self.counts.pop(key, None)
+        self.totals = [t - o + n for t, o, n in zip(self.totals, old, new)]
+
+    def on_exam_change(self, action, exam_id, row, before):
+        if self.period_id is None:
+            return
+        if (action == "reset" or before != self.signature
+                or (row is not None and row[SLOT] not in self.slot_index
+                    and slot_lane(row[SLOT])[0] is None)):
+            # Someone else wrote in between, or a new slot label needs new bit positions
+            self.invalidate()
+            return
+        old = self.rows.pop(exam_id, None)
+        if old is not None:
+            self.counts[old[:2]][old[2]] -= 1
+            self._rescore(old[:2])
+        if row is not None and row[PERIOD] == self.period_id:
+            key, bit = (str(row[SECTION]), row[DATE]), self.slot_index.get(row[SLOT])
+            self.counts.setdefault(key, defaultdict(int))[bit] += 1
+            self.rows[exam_id] = key + (bit,)
+            self._rescore(key)
+        self.signature = scheduler.db_signature()
+
+    # ---- queries ----
+    def score(self, period_id, worst=10):
+        """
+        Returns {"over_two_per_day", "back_to_back", "short_gap": counts,
+                 "penalty": weighted total (see PENALTIES), "sections": sections affected,
+                 "worst": [(section_id, date, exams, back_to_back, short_gap)] highest penalty first}
+        """
+        self.ensure(period_id)
+        over, b2b, short = self.totals
+        weights = (PENALTIES["over_two_per_day"], PENALTIES["back_to_back"], PENALTIES["short_gap"])
+
+        def weighted(p):
+            return sum(w * n for w, n in zip(weights, p))
+
+        bad = [(key, p) for key, p in self.penalties.items() if any(p)]
+        bad.sort(key=lambda item: (-weighted(item[1]), item[0][1], item[0][0]))
+        return {
+            "over_two_per_day": over,
+            "back_to_back": b2b,
+            "short_gap": short,
+            "penalty": weighted(self.totals),
+            "sections": len({key[0] for key, _p in bad}),
+            "worst": [(section, date, sum(self.counts[(section, date)].values()), p[1], p[2])
+                      for (section, date), p in bad[:worst]],
+        }
+
+
+scores = ScheduleScore()
+scheduler.exam_change_hooks.append(scores.on_exam_change)
+
+
+def score_period(period_id, worst=10):
+    """Student-load score of a period; see ScheduleScore.score."""
+    return scores.score(period_id, worst)
@@ -0,0 +1,178 @@
+"""
+Slot Suggestions
+----------------
+Proposes free (date, slot, room) combinations for a new exam so faculty do
+not have to guess and retry. Built on per-date occupancy bitmaps: one int
+per (resource, date) whose bit k is set when grid slot k is taken by an
+exam at an overlapping time. Checking a candidate is a few bit tests.
+Exams added through scheduler.add_exam are ORed in as they are saved; any
+other change to the database file rebuilds the bitmaps on the next query.
+The same conflicts as check_new_exam_conflicts() rule a candidate out, so
+any suggestion can be saved as is.
+"""
+
+from collections import defaultdict
+from heapq import nsmallest
+
+import scheduler
+from scheduler import list_exams, DATE, SLOT, INSTRUCTOR, PROCTOR, ROOM, SECTION, PERIOD
+from autoschedule import SUNDAY, period_grid
+from room_allocator import section_sizes, room_capacities
+from timeslots import parse_slot, slot_lane, slots_overlap
+
+
+def preferred_start(text):
+    """
+    Start minute of the first time range in free text such as an original
+    class time ("TTH 2:30-5:30 PM"), or None if there is none.
+    """
+    tokens = (text or "").split(",")[0].split()
+    for i in range(len(tokens)):
+        rng = parse_slot(" ".join(tokens[i:]))
+        if rng is not None:
+            return rng[0]
+    return None
+
+
+class SlotSuggester:
+    def __init__(self, skip_weekdays=(SUNDAY,)):
+        self.skip_weekdays = skip_weekdays
+        self.period_id = None
+        self.signature = None
+        self.rebuilds = 0
+        self.dates = []
+        self.slots = []
+        self.label_bits = {}  # slot label -> bitmap of the grid slots it overlaps
+        self.masks = {}       # (kind, key, date) -> bitmap over self.slots
+        self.instructors = {} # date -> {instructor: bitmap}
+        self.rooms = []       # [(capacity, label)], smallest first
+        self.sizes = {}
+
+    # ---- maintenance ----
+    def invalidate(self):
+        self.period_id = None
+        self.signature = None
+
+    def ensure(self, period_id):
+        if (period_id != self.period_id or self.signature is None
+                or self.signature != scheduler.db_signature()):
+            self.rebuild(period_id)
+
+    def rebuild(self, period_id):
+        # Stamp before reading, so a write racing the load forces another rebuild
+        self.signature = scheduler.db_signature()
+        self.period_id = period_id
+        grid = period_grid(period_id, self.skip_weekdays)
+        self.dates = sorted({d for d, _ in grid})
+        self.slots = [s for d, s in grid if d == self.dates[0]] if self.dates else []
+        self.rooms = room_capacities()
+        self.sizes = section_sizes()
+
+        self.label_bits = {}
+        self.masks = defaultdict(int)
+        self.instructors = defaultdict(lambda: defaultdict(int))
+        for row in list_exams(period_id):
+            self._mark(row)
+        self.rebuilds += 1
+
+    def _mark(self, row):
+        bits = self.label_bits.get(row[SLOT])
+        if bits is None:
+            bits = self.label_bits[row[SLOT]] = self.slot_bits(row[SLOT])
+        if not bits:
+            return
+        date = row[DATE]
+        masks = self.masks
+        masks[("room", row[ROOM].lower(), date)] |= bits
+        masks[("proctor", row[PROCTOR].lower(), date)] |= bits
+        masks[("section", str(row[SECTION]), date)] |= bits
+        self.instructors[date][row[INSTRUCTOR].lower()] |= bits
+
+    def on_exam_change(self, action, exam_id, row, before):
+        if self.period_id is None:
+            return
+        if action != "add" or before != self.signature:
+            # Bits cannot be cleared without knowing what else shares them
+            self.invalidate()
+            return
+        if row[PERIOD] == self.period_id:
+            self._mark(row)
+        self.signature = scheduler.db_signature()
+
+    def slot_bits(self, label):
+        """Bitmap of the grid slots that overlap `label`."""
+        bits = 0
+        for k, slot in enumerate(self.slots):
+            if slots_overlap(slot, label):
+                bits |= 1 << k
+        return bits
+
+    # ---- queries ----
+    def busy(self, date, section, instructor, proctor=None):
+        """Bitmap of grid slots on `date` where the exam cannot go, whatever the room."""
+        masks = self.masks
+        taken = masks.get(("section", section, date), 0)
+        if proctor:
+            taken |= masks.get(("proctor", proctor, date), 0)
+        # Like check_new_exam_conflicts: other instructors' exams block the slot
+        for name, bits in self.instructors.get(date, {}).items():
+            if name != instructor:
+                taken |= bits
+        return taken
+
+    def suggest(self, period_id, section_id, instructor, proctor=None, k=5,
+                preferred_slot=None, dates=None):
+        """
+        Top-k free (date, slot, room) for an exam of section_id given by
+        instructor (username), best first. One room per (date, slot): the
+        smallest free room that seats the section (the largest free one if
+        no room is big enough).
+        Ranked by: fewest exams that day for the section, not back-to-back
+        with another of its exams, closest to preferred_slot (a slot label
+        or an original class time such as "MWF 8:30-9:30 AM"), earliest date
+        and slot, fewest empty seats.
+        dates: optional subset of the period's dates to search.
+        """
+        self.ensure(period_id)
+        section = str(section_id)
+        instructor = instructor.lower()
+        proctor = proctor.lower() if proctor else None
+        size = self.sizes.get(section, 0)
+        rooms = [(cap, label, label.lower()) for cap, label in self.rooms if cap >= size]
+        if not rooms:
+            # No room seats the whole section: offer the largest ones instead
+            rooms = [(cap, label, label.lower()) for cap, label in reversed(self.rooms)]
+        full = (1 << len(self.slots)) - 1
+        preferred = preferred_start(preferred_slot)
+        wanted = set(dates) if dates is not None else None
+
+        candidates = []
+        for d, date in enumerate(self.dates):
+            if wanted is not None and date not in wanted:
+                continue
+            free = full & ~self.busy(date, section, instructor, proctor)
+            if not free:
+                continue
+            own = self.masks.get(("section", section, date), 0)
+            load = bin(own).count("1")
+            for s, slot in enumerate(self.slots):
+                if not free >> s & 1:
+                    continue
+                room = next(((cap, label) for cap, label, key in rooms
+                             if not self.masks.get(("room", key, date), 0) >> s & 1), None)
+                if room is None:
+                    continue
+                adjacent = bool(own & ((1 << (s + 1)) | (1 << s >> 1)))
+                distance = abs(slot_lane(slot)[1] - preferred) if preferred is not None else 0
+                waste = abs(room[0] - size)
+                candidates.append(((load, adjacent, distance, d, s, waste), (date, slot, room[1])))
+        return [c for _key, c in nsmallest(k, candidates, key=lambda item: item[0])]
+
+
+suggester = SlotSuggester()
+scheduler.exam_change_hooks.append(suggester.on_exam_change)
+
+
+def suggest_slots(period_id, section_id, instructor, proctor=None, k=5, preferred_slot=None, dates=None):
+    """Top-k free (date, slot, room) for a new exam; see SlotSuggester.suggest."""
+    return suggester.suggest(period_id, section_id, instructor, proctor, k, preferred_slot, dates)
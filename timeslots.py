@@ -0,0 +1,112 @@
+"""
+Time Slot Module
+----------------
+Turns slot labels such as "7:30-9:30 AM" or "10:00-12:00 PM" into minute
+ranges and answers overlap questions between them:
+- parse_slot: label -> (start, end) in minutes since midnight
+- IntervalList: per-date interval index used by the conflict checks
+"""
+
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+_SLOT_RE = re.compile(
+    r"^\s*(\d{1,2})(?::(\d{2}))?\s*([AP]\.?M\.?)?\s*[-–]\s*"
+    r"(\d{1,2})(?::(\d{2}))?\s*([AP]\.?M\.?)?\s*$",
+    re.IGNORECASE,
+)
+
+
+def _minutes(hour, minute, meridiem):
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem[0].upper() == "P" else 0)
+    return hour * 60 + minute
+
+
+@lru_cache(maxsize=None)
+def parse_slot(label):
+    """
+    Returns (start, end) in minutes since midnight, or None if the label
+    cannot be read. A single trailing AM/PM applies to both ends unless that
+    would put the start after the end ("10:00-12:00 PM" is 10 AM to noon).
+    """
+    m = _SLOT_RE.match(label or "")
+    if not m:
+        return None
+    h1, m1, mer1, h2, m2, mer2 = m.groups()
+    end = _minutes(int(h2), int(m2 or 0), mer2)
+    start = _minutes(int(h1), int(m1 or 0), mer1 or mer2)
+    if not mer1 and mer2 and start > end:
+        start -= 12 * 60
+    if not 0 <= start < end <= 24 * 60:
+        return None
+    return start, end
+
+
+def slot_lane(label):
+    """
+    Returns (lane, start, end) for a slot label. Readable labels share lane
+    None and overlap by time; unreadable ones get a lane of their own, so they
+    only ever clash with the exact same label.
+    """
+    rng = parse_slot(label)
+    if rng is None:
+        return label, 0, 1
+    return None, rng[0], rng[1]
+
+
+def slots_overlap(a, b):
+    la, sa, ea = slot_lane(a)
+    lb, sb, eb = slot_lane(b)
+    return la == lb and sa < eb and sb < ea
+
+
+class IntervalList:
+    """
+    Intervals kept sorted by start, with the longest length seen so far.
+    A query bisects to the first interval that could still be running and
+    walks forward until starts pass the query end, which is O(log n + k) when
+    bookings have slot-like lengths.
+    """
+
+    __slots__ = ("items", "max_len")
+
+    def __init__(self):
+        self.items = []  # (start, end, exam_id)
+        self.max_len = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, start, end, exam_id):
+        insort(self.items, (start, end, exam_id))
+        self.max_len = max(self.max_len, end - start)
+
+    def remove(self, start, end, exam_id):
+        i = bisect_left(self.items, (start, end, exam_id))
+        if i < len(self.items) and self.items[i] == (start, end, exam_id):
+            del self.items[i]
+
+    def overlapping(self, start, end):
+        items = self.items
+        i = bisect_left(items, (start - self.max_len,))
+        while i < len(items) and items[i][0] < end:
+            if items[i][1] > start:
+                yield items[i][2]
+            i += 1
+
+
+def overlapping_pairs(members):
+    """
+    Sweep line over (start, end, idx) tuples; returns every (idx, idx) pair
+    whose intervals overlap, smaller index first.
+    """
+    pairs = []
+    active = []
+    for start, end, idx in sorted(members):
+        active = [a for a in active if a[0] > start]
+        for _end, other in active:
+            pairs.append((other, idx) if other < idx else (idx, other))
+        active.append((end, idx))
+    return pairs
@@ -0,0 +1,128 @@
+"""
+Exam Validation
+---------------
+Checks a faculty member's new or edited exam and saves it in one step:
+- Every check and the write run inside a single BEGIN IMMEDIATE
+  transaction, so no other user can book the same slot in between
+- Two reads gather everything the checks need: the section and subject
+  lookups, then the period's exams on that date or for that subject
+- Every problem found is returned, not just the first
+The rules are the ones the exam form has always applied: required fields,
+known section and subject, room/proctor/instructor/section conflicts for
+new exams, and one exam per subject per period.
+"""
+
+import scheduler
+from scheduler import EXAM_COLUMNS, DATE, SLOT, CODE, TITLE, INSTRUCTOR, PROCTOR, ROOM, SECTION, EXAM_ID
+from occupancy import OccupancyIndex
+
+REQUIRED = (
+    ("subject", "Please select a subject from the dropdown."),
+    ("slot", "Please select an exam time slot."),
+    ("room", "Please select a room."),
+    ("proctor", "Please enter a proctor name."),
+    ("section", "Please select a section."),
+)
+
+
+def _violation(kind, code, message, exam=None):
+    return {"kind": kind, "code": code, "message": message, "exam": exam}
+
+
+def _conflict_message(kind, exam):
+    if kind == "room":
+        return f"Room '{exam[ROOM]}' is already booked on {exam[DATE]} at {exam[SLOT]}."
+    if kind == "proctor":
+        return f"Proctor '{exam[PROCTOR]}' is already assigned on {exam[DATE]} at {exam[SLOT]}."
+    if kind == "instructor":
+        return f"Instructor '{exam[INSTRUCTOR]}' has another exam on {exam[DATE]} at {exam[SLOT]}."
+    return (f"Section {exam[SECTION]} already has an exam on {exam[DATE]} at {exam[SLOT]} "
+            f"with proctor '{exam[PROCTOR]}' in room '{exam[ROOM]}'.")
+
+
+def validate_and_save_exam(period_id, faculty_username, subject_code, subject_description,
+                           section_name, exam_date, exam_slot, proctor, room,
+                           exam_id=None, dry_run=False):
+    """
+    Validates an exam and, if nothing is wrong, adds it (exam_id None) or
+    updates the date, slot, proctor and room of exam_id.
+    Returns {"saved": bool, "exam_id": id or None, "action": "add" | "update",
+             "violations": [{"kind": "missing" | "lookup" | "conflict" | "duplicate",
+                             "code", "message", "exam": clashing exam row or None}]}
+    dry_run runs every check but writes nothing.
+    """
+    action = "add" if exam_id is None else "update"
+    values = {"subject": subject_code and subject_description, "slot": exam_slot,
+              "room": room, "proctor": proctor, "section": section_name}
+    violations = [_violation("missing", f"missing_{field}", message)
+                  for field, message in REQUIRED if not (values[field] or "").strip()]
+    result = {"saved": False, "exam_id": exam_id, "action": action, "violations": violations}
+    if violations:
+        return result
+    subject_code, subject_description = subject_code.strip(), subject_description.strip()
+    exam_slot, proctor, room = exam_slot.strip(), proctor.strip(), room.strip()
+
+    with scheduler.write_transaction() as conn:
+        before = scheduler.db_signature()
+        section_id, subject_known, editing = conn.execute("""
+            SELECT (SELECT section_id FROM sections WHERE section_name=?),
+                   EXISTS (SELECT 1 FROM subjects WHERE code=? AND title=?),
+                   EXISTS (SELECT 1 FROM exams WHERE id=?)
+        """, (section_name.strip(), subject_code, subject_description, exam_id)).fetchone()
+        if section_id is None:
+            violations.append(_violation("lookup", "unknown_section", "Invalid section selected."))
+        if not subject_known:
+            violations.append(_violation("lookup", "unknown_subject",
+                                         "Subject not found. Please pick from the dropdown."))
+        if exam_id is not None and not editing:
+            violations.append(_violation("lookup", "unknown_exam", "No exam selected for update."))
+        if violations:
+            return result
+
+        # Everything the remaining checks look at, in one statement: two index searches
+        rows = [r for r in conn.execute(f"""
+            SELECT {EXAM_COLUMNS} FROM exams WHERE period_id=? AND exam_date=?
+            UNION
+            SELECT {EXAM_COLUMNS} FROM exams WHERE period_id=? AND subject_code=? AND subject_description=?
+        """, (period_id, exam_date, period_id, subject_code, subject_description)) if r[EXAM_ID] != exam_id]
+
+        if exam_id is None:
+            # Same rules as check_new_exam_conflicts(), over the rows read under the lock
+            index = OccupancyIndex()
+            for row in rows:
+                index.add_row(row)
+            new_exam = (exam_date, exam_slot, subject_code, subject_description,
+                        faculty_username, proctor, room, section_id)
+            for kind, exam in index.conflicts_with(new_exam):
+                violations.append(_violation("conflict", f"{kind}_conflict", _conflict_message(kind, exam), exam))
+        same_subject = [r for r in rows if r[CODE] == subject_code and r[TITLE] == subject_description]
+        if exam_id is not None:
+            for exam in same_subject:
+                if ((exam[SLOT], exam[PROCTOR], exam[ROOM], str(exam[SECTION]))
+                        == (exam_slot, proctor, room, str(section_id))):
+                    violations.append(_violation(
+                        "duplicate", "identical_exam",
+                        "An identical exam (same subject, section, slot, proctor, and room) already exists "
+                        "in this period. Please adjust the details or check for duplicates.", exam))
+        if same_subject:
+            violations.append(_violation(
+                "duplicate", "duplicate_subject",
+                "An exam for this subject already exists in the current period. "
+                + ("You cannot create another exam for the same subject." if exam_id is None else
+                   "This exam cannot be updated while that one exists."), same_subject[0]))
+        if violations or dry_run:
+            return result
+
+        if exam_id is None:
+            exam_id = conn.execute("""
+                INSERT INTO exams (faculty_username, subject_code, subject_description,
+                                   exam_date, exam_slot, proctor, room, period_id, section_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (faculty_username.strip(), subject_code, subject_description,
+                  exam_date, exam_slot, proctor, room, period_id, section_id)).lastrowid
+        else:
+            conn.execute("UPDATE exams SET exam_date=?, exam_slot=?, proctor=?, room=? WHERE id=?",
+                         (exam_date, exam_slot, proctor, room, exam_id))
+    result.update(saved=True, exam_id=exam_id)
+    scheduler.notify_exam_change(action, exam_id, scheduler.get_exam(exam_id), before)
+    return result